@@ -4,6 +4,21 @@ import os
 # Tworzymy ikonę 32x32 (favicon) i 64x64 (większa ikona)
 sizes = [(32, 32), (64, 64)]
 
+# Załadowane czcionki (rozmiar -> czcionka), plik TTF parsujemy raz na rozmiar
+fonts = {}
+
+def load_font(font_size):
+    """Zwraca czcionkę Arial Black w danym rozmiarze (z cache)"""
+    if font_size not in fonts:
+        try:
+            font_path = "C:/Windows/Fonts/ariblk.ttf"
+            if not os.path.exists(font_path):
+                font_path = "C:/Windows/Fonts/arialbd.ttf"
+            fonts[font_size] = ImageFont.truetype(font_path, font_size)
+        except:
+            fonts[font_size] = ImageFont.load_default()
+    return fonts[font_size]
+
 for size in sizes:
     width, height = size
     
@@ -25,14 +40,7 @@ for size in sizes:
     )
     
     # Próba użycia czcionki Arial Black
-    try:
-        font_path = "C:/Windows/Fonts/ariblk.ttf"
-        if not os.path.exists(font_path):
-            font_path = "C:/Windows/Fonts/arialbd.ttf"
-        font_size = 24 if width == 32 else 48
-        font = ImageFont.truetype(font_path, font_size)
-    except:
-        font = ImageFont.load_default()
+    font = load_font(24 if width == 32 else 48)
     
     # Tekst do narysowania
     text = "G"
@@ -46,15 +54,10 @@ for size in sizes:
     text_x = (width - text_width) // 2
     text_y = (height - text_height) // 2 - (5 if width == 32 else 8)
     
-    # Rysowanie tekstu z czerwoną obwódką
+    # Rysowanie tekstu z czerwoną obwódką i czarnym wypełnieniem w jednym przebiegu
     outline_width = 1 if width == 32 else 2
-    for adj_x in range(-outline_width, outline_width + 1):
-        for adj_y in range(-outline_width, outline_width + 1):
-            if adj_x != 0 or adj_y != 0:
-                draw.text((text_x + adj_x, text_y + adj_y), text, font=font, fill=border_color)
-    
-    # Potem rysujemy czarne wypełnienie
-    draw.text((text_x, text_y), text, font=font, fill='#000000')
+    draw.text((text_x, text_y), text, font=font, fill='#000000',
+              stroke_width=outline_width, stroke_fill=border_color)
     
     # Zapis obrazu
     if width == 32:
@@ -44,16 +44,14 @@ text_height = bbox[3] - bbox[1]
 text_x = (width - text_width) // 2
 text_y = (height - text_height) // 2 - 25
 
-# Rysowanie tekstu z czerwoną obwódką
-# Najpierw rysujemy czerwoną obwódkę (grubą)
+# Rysowanie tekstu z czerwoną obwódką (grubą) i czarnym wypełnieniem
+# Glif rasteryzowany raz do maski, obwódka to maska poszerzona filtrem MaxFilter
 outline_width = 3
-for adj_x in range(-outline_width, outline_width + 1):
-    for adj_y in range(-outline_width, outline_width + 1):
-        if adj_x != 0 or adj_y != 0:
-            draw.text((text_x + adj_x, text_y + adj_y), text, font=font, fill=border_color)
-
-# Potem rysujemy czarne wypełnienie
-draw.text((text_x, text_y), text, font=font, fill='#000000')
+text_mask = Image.new('L', (width, height), 0)
+ImageDraw.Draw(text_mask).text((text_x, text_y), text, font=font, fill=255)
+outline_mask = text_mask.filter(ImageFilter.MaxFilter(outline_width * 2 + 1))
+image.paste(border_color, mask=outline_mask)
+image.paste('#000000', mask=text_mask)
 
 # Zapis obrazu
 output_path = os.path.join('static', 'images', 'logo.png')
@@ -3,9 +3,22 @@ Protokolant - Meeting Minutes Management Application
 Entry point for running the Flask application
 """
 
+import os
+
+# Green-thread servers need the stdlib patched before anything else is imported
+ASYNC_MODE = os.environ.get('PROTOKOLANT_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 from src.app import create_app, socketio
 
 if __name__ == '__main__':
+    # Development server creates missing tables on startup
+    os.environ.setdefault('PROTOKOLANT_INIT_DB', '1')
     app = create_app()
     print("=" * 60)
     print("Protokolant - Aplikacja do zarządzania protokołami")
@@ -2,43 +2,231 @@
 Flask application factory and configuration
 """
 
-from flask import Flask
+from flask import Flask, g
+from flask.json.provider import DefaultJSONProvider
+import click
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sqlite3
+
+# Optional gzip/brotli response compression
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# Optional faster JSON encoding for jsonify responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 db = SQLAlchemy()
 socketio = SocketIO()
 
+# PRAGMAs applied to every new SQLite connection: WAL lets readers run
+# concurrently with the writer, busy_timeout waits for locks instead of failing
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'busy_timeout=5000',
+    'cache_size=-20000',
+    'temp_store=memory',
+    'foreign_keys=ON',
+)
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure SQLite connection for concurrent access"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {pragma}')
+    cursor.close()
+
+def _disable_pysqlite_begin(dbapi_connection, connection_record):
+    """Stop pysqlite from issuing its own deferred BEGIN"""
+    dbapi_connection.isolation_level = None
+
+def _begin_immediate(conn):
+    """Take the write lock when the transaction starts, not on first INSERT"""
+    conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson
+
+    Keeps Flask's defaults: sorted keys, HTTP date format for datetimes
+    and the same fallback for types orjson does not handle.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Schema version kept in PRAGMA user_version. create_all() only adds missing
+# tables, so changes to existing ones need a step in SCHEMA_MIGRATIONS
+SCHEMA_VERSION = 1
+
+def _rebuild_table(conn, name):
+    """Recreate table from the current model definition, keeping its rows"""
+    table = db.metadata.tables[name]
+    quote = conn.dialect.identifier_preparer.quote
+    old_name = f'{name}_old'
+    old_columns = {column['name'] for column in inspect(conn).get_columns(name)}
+    columns = ', '.join(quote(column.name) for column in table.columns if column.name in old_columns)
+    
+    conn.exec_driver_sql(f'ALTER TABLE {quote(name)} RENAME TO {quote(old_name)}')
+    # Indexes move with the renamed table and would clash with the new ones
+    for index in table.indexes:
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS {quote(index.name)}')
+    table.create(conn)
+    # Rows orphaned while foreign keys were not enforced are dropped
+    conn.exec_driver_sql(
+        f'INSERT INTO {quote(name)} ({columns}) SELECT {columns} FROM {quote(old_name)} '
+        f'WHERE protocol_id IN (SELECT id FROM protocols)'
+    )
+    conn.exec_driver_sql(f'DROP TABLE {quote(old_name)}')
+
+def _migrate_cascade_and_indexes(conn):
+    """Version 1: ON DELETE CASCADE foreign keys and protocol_id/date indexes"""
+    existing = set(inspect(conn).get_table_names())
+    for name in ('participants', 'agenda_items', 'action_items'):
+        if name in existing:
+            _rebuild_table(conn, name)
+    if 'protocols' in existing:
+        for index in db.metadata.tables['protocols'].indexes:
+            index.create(conn, checkfirst=True)
+
+SCHEMA_MIGRATIONS = {
+    1: _migrate_cascade_and_indexes,
+}
+
+def upgrade_db():
+    """Create missing tables and apply pending schema migrations"""
+    with db.engine.begin() as conn:
+        version = conn.exec_driver_sql('PRAGMA user_version').scalar()
+        # Fresh database - create_all() already builds the current schema
+        if inspect(conn).get_table_names():
+            for step in range(version + 1, SCHEMA_VERSION + 1):
+                SCHEMA_MIGRATIONS[step](conn)
+        db.metadata.create_all(conn)
+        conn.exec_driver_sql(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+def get_reader_session() -> Session:
+    """
+    Return request-scoped read-only session bound to the reader pool
+
+    Writes go through db.session (single-connection writer pool), reads
+    that do not need to modify data should use this session instead.
+    """
+    if 'reader_session' not in g:
+        g.reader_session = Session(db.engines['reader'])
+    return g.reader_session
+
 def create_app():
     """Create and configure Flask application"""
     app = Flask(__name__, 
                 template_folder='../templates',
                 static_folder='../static')
     
+    if ORJSON_AVAILABLE:
+        app.json = ORJSONProvider(app)
+    
     # Configuration
     app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///../data/protocols.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Single writer connection - SQLite allows only one writer at a time
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 1, 'max_overflow': 0}
+    # Separate read-only pool, WAL lets readers run alongside the writer
+    app.config['SQLALCHEMY_BINDS'] = {
+        'reader': {
+            'url': 'sqlite:///file:../data/protocols.db?mode=ro&uri=true',
+            'pool_size': 8,
+            'max_overflow': 4,
+        }
+    }
+    # 'threading' by default - recording and transcription block on audio/CPU;
+    # 'eventlet' or 'gevent' multiplex many idle connections (see run.py)
+    app.config['SOCKETIO_ASYNC_MODE'] = os.environ.get('PROTOKOLANT_ASYNC_MODE', 'threading')
+    # Compress JSON and HTML responses - command lists repeat the same keys
+    app.config['COMPRESS_MIMETYPES'] = [
+        'application/json',
+        'text/html',
+        'text/css',
+        'application/javascript',
+    ]
+    app.config['COMPRESS_LEVEL'] = 6
+    # Worker threads for speech transcription jobs run outside the request
+    app.config['TRANSCRIPTION_WORKERS'] = int(os.environ.get('PROTOKOLANT_TRANSCRIPTION_WORKERS', 2))
     
-    # Ensure data directory exists
+    # Temporary files for uploads ffmpeg cannot decode from a pipe
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+    
+    # Ensure data and upload directories exist
     os.makedirs(os.path.join(os.path.dirname(__file__), '..', 'data'), exist_ok=True)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     # Initialize database
     db.init_app(app)
+
+    @app.teardown_appcontext
+    def close_reader_session(exception=None):
+        reader_session = g.pop('reader_session', None)
+        if reader_session is not None:
+            reader_session.close()
+    
+    if COMPRESS_AVAILABLE:
+        Compress(app)
     
     # Initialize SocketIO
-    socketio.init_app(app, cors_allowed_origins="*", async_mode='threading')
+    socketio.init_app(app, cors_allowed_origins="*", async_mode=app.config['SOCKETIO_ASYNC_MODE'])
+    
+    # Background executor for long-running transcription jobs
+    app.extensions['transcription_executor'] = ThreadPoolExecutor(
+        max_workers=app.config['TRANSCRIPTION_WORKERS'],
+        thread_name_prefix='transcription'
+    )
+    # Separate executor so PDF exports do not queue behind recordings
+    app.extensions['pdf_executor'] = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pdf')
     
     # Register routes
     with app.app_context():
         from . import routes
         from . import models
         
-        # Create database tables
-        db.create_all()
+        # Writer transactions use BEGIN IMMEDIATE to avoid SQLITE_BUSY on lock upgrade
+        event.listen(db.engine, 'connect', _disable_pysqlite_begin)
+        event.listen(db.engine, 'begin', _begin_immediate)
+        
+        # Create tables and migrate the schema only when requested - once per
+        # deployment, not in every worker process (see `flask init-db`)
+        if os.environ.get('PROTOKOLANT_INIT_DB') == '1':
+            upgrade_db()
         
         # Register blueprints
         app.register_blueprint(routes.bp)
     
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables and apply schema migrations"""
+        upgrade_db()
+        click.echo('Baza danych zainicjalizowana.')
+    
     return app
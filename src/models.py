@@ -11,15 +11,15 @@ class Protocol(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    participants = db.relationship('Participant', backref='protocol', lazy=True, cascade='all, delete-orphan')
-    agenda_items = db.relationship('AgendaItem', backref='protocol', lazy=True, cascade='all, delete-orphan')
-    action_items = db.relationship('ActionItem', backref='protocol', lazy=True, cascade='all, delete-orphan')
+    # Relationships - children are removed by ON DELETE CASCADE in the database
+    participants = db.relationship('Participant', back_populates='protocol', lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
+    agenda_items = db.relationship('AgendaItem', back_populates='protocol', lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
+    action_items = db.relationship('ActionItem', back_populates='protocol', lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<Protocol {self.title}>'
@@ -31,7 +31,9 @@ class Participant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100))
-    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id'), nullable=False)
+    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    protocol = db.relationship('Protocol', back_populates='participants')
     
     def __repr__(self):
         return f'<Participant {self.name}>'
@@ -39,12 +41,18 @@ class Participant(db.Model):
 class AgendaItem(db.Model):
     """Model representing an agenda item in a meeting"""
     __tablename__ = 'agenda_items'
+    # Composite index also serves lookups by protocol_id alone
+    __table_args__ = (
+        db.Index('ix_agenda_protocol_order', 'protocol_id', 'order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     discussion = db.Column(db.Text)
     order = db.Column(db.Integer, default=0)
-    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id'), nullable=False)
+    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id', ondelete='CASCADE'), nullable=False)
+    
+    protocol = db.relationship('Protocol', back_populates='agenda_items')
     
     def __repr__(self):
         return f'<AgendaItem {self.title}>'
@@ -58,7 +66,9 @@ class ActionItem(db.Model):
     assignee = db.Column(db.String(100), nullable=False)
     deadline = db.Column(db.Date)
     status = db.Column(db.String(20), default='pending')  # pending, completed
-    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id'), nullable=False)
+    protocol_id = db.Column(db.Integer, db.ForeignKey('protocols.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    protocol = db.relationship('Protocol', back_populates='action_items')
     
     def __repr__(self):
         return f'<ActionItem {self.description[:30]}>'
@@ -2,20 +2,251 @@
 Web routes for Protokolant application
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from datetime import datetime
-import os
-from .app import db
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app, make_response
+from collections import OrderedDict
+from contextlib import contextmanager
+import atexit
+from datetime import datetime, date
+from itertools import islice, zip_longest
+import io
+import queue
+import re
+import threading
+import uuid
+from typing import Optional
+from werkzeug.utils import secure_filename
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import selectinload, raiseload, lazyload
+from .app import db, socketio, get_reader_session
 from .models import Protocol, Participant, AgendaItem, ActionItem
-from .speech_to_text import SpeechToTextProcessor, record_speech_to_text
-from .voice_config import VoiceCommandsConfig
+from .speech_to_text import SpeechToTextProcessor
+from .voice_config import VoiceCommandsConfig, get_config_manager
 
 bp = Blueprint('main', __name__)
 
+# Blokada wspólnej konfiguracji poleceń (get_config_manager) w żądaniach
+_voice_config_lock = threading.Lock()
+
+@contextmanager
+def voice_config():
+    """
+    Udostępnia wspólną konfigurację poleceń głosowych
+    
+    Instancja pochodzi z get_config_manager - plik czytany ponownie tylko po
+    zmianie. Blokada serializuje odczyty i zapisy z równoległych żądań.
+    """
+    with _voice_config_lock:
+        yield get_config_manager()
+
+class _ProcessorPool:
+    """
+    Pula procesorów mowy wielokrotnego użytku
+    
+    Procesory tworzone są raz, a nie przy każdym żądaniu; model Whisper jest
+    współdzielony przez wszystkie procesory (get_whisper_model). Jeden procesor
+    obsługuje naraz jedno żądanie; gdy wszystkie są zajęte, a limit został
+    osiągnięty, żądanie czeka na zwolnienie.
+    """
+    
+    def __init__(self, size: int, **processor_kwargs):
+        self._size = size
+        self._processor_kwargs = processor_kwargs
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _create(self) -> SpeechToTextProcessor:
+        """Tworzy procesor poza blokadą - miejsce w puli jest już zarezerwowane"""
+        try:
+            processor = SpeechToTextProcessor(**self._processor_kwargs)
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._all.append(processor)
+        return processor
+    
+    @contextmanager
+    def processor(self):
+        """Wypożycza procesor z puli na czas bloku with"""
+        try:
+            processor = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            processor = self._create() if create else self._idle.get()
+        try:
+            yield processor
+        finally:
+            self._idle.put(processor)
+    
+    def close(self):
+        """Zwalnia zasoby wszystkich utworzonych procesorów"""
+        with self._lock:
+            for processor in self._all:
+                processor.cleanup()
+
+SPEECH_PROCESSOR_POOL_SIZE = 2
+
+_speech_pools = {
+    False: _ProcessorPool(SPEECH_PROCESSOR_POOL_SIZE, enable_voice_commands=False),
+    True: _ProcessorPool(SPEECH_PROCESSOR_POOL_SIZE, enable_voice_commands=True),
+}
+
+@atexit.register
+def _close_speech_pools():
+    for pool in _speech_pools.values():
+        pool.close()
+
+def speech_processor(enable_voice_commands: bool = False):
+    """Zwraca menedżer kontekstu wypożyczający procesor mowy z puli"""
+    return _speech_pools[enable_voice_commands].processor()
+
+# Form field formats: datetime-local and date inputs
+_DT_FMT = '%Y-%m-%dT%H:%M'
+_D_FMT = '%Y-%m-%d'
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    Parse datetime-local form value (YYYY-MM-DDTHH:MM)
+    
+    fromisoformat is implemented in C; strptime is kept for non-ISO input.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, _DT_FMT)
+
+def _parse_date(value: str) -> Optional[date]:
+    """Parse date form value (YYYY-MM-DD), empty value means no date"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, _D_FMT).date()
+
+class _FilenameChars(dict):
+    """
+    str.translate table for download filenames
+    
+    Word characters (including Polish letters) are kept, '-' and whitespace
+    become '_', everything else is dropped. Entries are filled on first use.
+    """
+    
+    def __missing__(self, code):
+        char = chr(code)
+        if char.isalnum() or char == '_':
+            value = code
+        elif char == '-' or char.isspace():
+            value = '_'
+        else:
+            value = None
+        self[code] = value
+        return value
+
+_FILENAME_CHARS = _FilenameChars()
+_UNDERSCORE_RUN = re.compile(r'_+')
+
+def _loader_options(*options):
+    """
+    Return loader options for a read query
+    
+    In debug mode any relationship not loaded explicitly raises on access,
+    so hidden N+1 lazy loads show up during development.
+    """
+    if current_app.debug:
+        return (*options, raiseload('*'))
+    return options
+
+def _participant_rows(form, protocol_id: int) -> list:
+    """Build participant rows from submitted form lists"""
+    return [
+        {'name': name, 'protocol_id': protocol_id}
+        for name in map(str.strip, form.getlist('participants[]')) if name
+    ]
+
+def _agenda_rows(form, protocol_id: int) -> list:
+    """Build agenda item rows from submitted form lists, order follows the form"""
+    agenda_titles = map(str.strip, form.getlist('agenda_title[]'))
+    agenda_discussions = form.getlist('agenda_discussion[]')
+    return [
+        {'title': title, 'discussion': discussion, 'order': i, 'protocol_id': protocol_id}
+        for i, (title, discussion) in enumerate(zip_longest(agenda_titles, agenda_discussions, fillvalue=''))
+        if title
+    ]
+
+def _action_rows(form, protocol_id: int) -> list:
+    """Build action item rows from submitted form lists"""
+    action_descriptions = map(str.strip, form.getlist('action_description[]'))
+    action_assignees = map(str.strip, form.getlist('action_assignee[]'))
+    action_deadlines = form.getlist('action_deadline[]')
+    return [
+        {
+            'description': description,
+            'assignee': assignee,
+            'deadline': _parse_date(deadline_str),
+            'protocol_id': protocol_id
+        }
+        for description, assignee, deadline_str in zip_longest(
+            action_descriptions, action_assignees, action_deadlines, fillvalue=''
+        )
+        if description
+    ]
+
+# Child tables with their row builders and the edit form flag of the section
+_PROTOCOL_CHILDREN = (
+    (Participant, _participant_rows, 'participants_modified'),
+    (AgendaItem, _agenda_rows, 'agenda_modified'),
+    (ActionItem, _action_rows, 'actions_modified'),
+)
+
+def _insert_protocol_children(protocol_id: int, children=_PROTOCOL_CHILDREN):
+    """Insert participants, agenda and action items from the form, one batch per table"""
+    for model, build_rows, _ in children:
+        rows = build_rows(request.form, protocol_id)
+        if rows:
+            db.session.bulk_insert_mappings(model, rows)
+
+def _load_protocol_or_404(protocol_id: int) -> Protocol:
+    """Load protocol with all child collections through the reader session"""
+    protocol = get_reader_session().execute(
+        select(Protocol)
+        .options(*_loader_options(
+            selectinload(Protocol.participants),
+            selectinload(Protocol.agenda_items),
+            selectinload(Protocol.action_items)
+        ))
+        .where(Protocol.id == protocol_id)
+    ).scalar_one_or_none()
+    if protocol is None:
+        abort(404)
+    return protocol
+
 @bp.route('/')
 def index():
     """Display list of all protocols"""
-    protocols = Protocol.query.order_by(Protocol.date.desc()).all()
+    participant_count = (
+        select(func.count(Participant.id))
+        .where(Participant.protocol_id == Protocol.id)
+        .correlate(Protocol)
+        .scalar_subquery()
+    )
+    # Lightweight rows with only the listed columns - no ORM objects to build
+    protocols = get_reader_session().execute(
+        select(
+            Protocol.id,
+            Protocol.title,
+            Protocol.date,
+            Protocol.location,
+            participant_count.label('participant_count')
+        )
+        .order_by(Protocol.date.desc())
+    ).all()
     return render_template('index.html', protocols=protocols)
 
 @bp.route('/protocol/new', methods=['GET', 'POST'])
@@ -26,48 +257,16 @@ def new_protocol():
             # Create protocol
             protocol = Protocol(
                 title=request.form['title'],
-                date=datetime.strptime(request.form['date'], '%Y-%m-%dT%H:%M'),
+                date=_parse_datetime(request.form['date']),
                 location=request.form.get('location', '')
             )
-            db.session.add(protocol)
-            db.session.flush()  # Get protocol ID
-            
-            # Add participants
-            participants_data = request.form.getlist('participants[]')
-            for name in participants_data:
-                if name.strip():
-                    participant = Participant(name=name.strip(), protocol_id=protocol.id)
-                    db.session.add(participant)
-            
-            # Add agenda items
-            agenda_titles = request.form.getlist('agenda_title[]')
-            agenda_discussions = request.form.getlist('agenda_discussion[]')
-            for i, title in enumerate(agenda_titles):
-                if title.strip():
-                    agenda = AgendaItem(
-                        title=title.strip(),
-                        discussion=agenda_discussions[i] if i < len(agenda_discussions) else '',
-                        order=i,
-                        protocol_id=protocol.id
-                    )
-                    db.session.add(agenda)
-            
-            # Add action items
-            action_descriptions = request.form.getlist('action_description[]')
-            action_assignees = request.form.getlist('action_assignee[]')
-            action_deadlines = request.form.getlist('action_deadline[]')
-            for i, description in enumerate(action_descriptions):
-                if description.strip():
-                    deadline_str = action_deadlines[i] if i < len(action_deadlines) else None
-                    deadline = datetime.strptime(deadline_str, '%Y-%m-%d').date() if deadline_str else None
-                    
-                    action = ActionItem(
-                        description=description.strip(),
-                        assignee=action_assignees[i] if i < len(action_assignees) else '',
-                        deadline=deadline,
-                        protocol_id=protocol.id
-                    )
-                    db.session.add(action)
+            # One transaction; the only flush needed is the explicit one for the ID
+            with db.session.no_autoflush:
+                db.session.add(protocol)
+                db.session.flush()  # Get protocol ID
+                
+                # Add participants, agenda and action items
+                _insert_protocol_children(protocol.id)
             
             db.session.commit()
             flash('Protokół został utworzony pomyślnie!', 'success')
@@ -83,60 +282,32 @@ def new_protocol():
 @bp.route('/protocol/<int:protocol_id>')
 def view_protocol(protocol_id):
     """View a specific protocol"""
-    protocol = Protocol.query.get_or_404(protocol_id)
+    protocol = _load_protocol_or_404(protocol_id)
     return render_template('view_protocol.html', protocol=protocol)
 
 @bp.route('/protocol/<int:protocol_id>/edit', methods=['GET', 'POST'])
 def edit_protocol(protocol_id):
     """Edit an existing protocol"""
-    protocol = Protocol.query.get_or_404(protocol_id)
-    
     if request.method == 'POST':
+        # Children are replaced wholesale, so skip loading the current ones
+        protocol = db.session.get(Protocol, protocol_id, options=[lazyload('*')])
+        if protocol is None:
+            abort(404)
+        
         try:
             # Update protocol
             protocol.title = request.form['title']
-            protocol.date = datetime.strptime(request.form['date'], '%Y-%m-%dT%H:%M')
+            protocol.date = _parse_datetime(request.form['date'])
             protocol.location = request.form.get('location', '')
             
-            # Clear existing participants and add new ones
-            Participant.query.filter_by(protocol_id=protocol.id).delete()
-            participants_data = request.form.getlist('participants[]')
-            for name in participants_data:
-                if name.strip():
-                    participant = Participant(name=name.strip(), protocol_id=protocol.id)
-                    db.session.add(participant)
-            
-            # Clear existing agenda items and add new ones
-            AgendaItem.query.filter_by(protocol_id=protocol.id).delete()
-            agenda_titles = request.form.getlist('agenda_title[]')
-            agenda_discussions = request.form.getlist('agenda_discussion[]')
-            for i, title in enumerate(agenda_titles):
-                if title.strip():
-                    agenda = AgendaItem(
-                        title=title.strip(),
-                        discussion=agenda_discussions[i] if i < len(agenda_discussions) else '',
-                        order=i,
-                        protocol_id=protocol.id
-                    )
-                    db.session.add(agenda)
-            
-            # Clear existing action items and add new ones
-            ActionItem.query.filter_by(protocol_id=protocol.id).delete()
-            action_descriptions = request.form.getlist('action_description[]')
-            action_assignees = request.form.getlist('action_assignee[]')
-            action_deadlines = request.form.getlist('action_deadline[]')
-            for i, description in enumerate(action_descriptions):
-                if description.strip():
-                    deadline_str = action_deadlines[i] if i < len(action_deadlines) else None
-                    deadline = datetime.strptime(deadline_str, '%Y-%m-%d').date() if deadline_str else None
-                    
-                    action = ActionItem(
-                        description=description.strip(),
-                        assignee=action_assignees[i] if i < len(action_assignees) else '',
-                        deadline=deadline,
-                        protocol_id=protocol.id
-                    )
-                    db.session.add(action)
+            # Replace only sections changed in the form - a missing flag counts as changed
+            changed = [child for child in _PROTOCOL_CHILDREN if request.form.get(child[2], '1') != '0']
+            # Protocol UPDATE is flushed at commit, not before each child statement
+            with db.session.no_autoflush:
+                # Core DELETE per table - no fetch or session synchronization
+                for model, _, _ in changed:
+                    db.session.execute(model.__table__.delete().where(model.protocol_id == protocol.id))
+                _insert_protocol_children(protocol.id, changed)
             
             db.session.commit()
             flash('Protokół został zaktualizowany pomyślnie!', 'success')
@@ -147,67 +318,246 @@ def edit_protocol(protocol_id):
             flash(f'Błąd podczas aktualizacji protokołu: {str(e)}', 'error')
             return redirect(url_for('main.edit_protocol', protocol_id=protocol_id))
     
+    # Form is rendered through the reader pool - the writer connection stays free
+    protocol = _load_protocol_or_404(protocol_id)
     return render_template('edit_protocol.html', protocol=protocol)
 
+def _pdf_download_name(participant_names, protocol_date: datetime) -> str:
+    """
+    Create PDF filename from up to 3 participant last names and the date
+    
+    Only the first three names are consumed from the iterable.
+    """
+    # Get last name (last word in name)
+    last_names = [parts[-1] for parts in map(str.split, islice(participant_names, 3)) if parts]
+    date_str = protocol_date.strftime('%Y%m%d')
+    
+    if last_names:
+        stem = f"Protokol_{'-'.join(last_names)}_{date_str}"
+    else:
+        stem = f"Protokol_{date_str}"
+    
+    # Remove special characters from filename, keep the extension dot
+    return _UNDERSCORE_RUN.sub('_', stem.translate(_FILENAME_CHARS)) + '.pdf'
+
 @bp.route('/protocol/<int:protocol_id>/pdf')
 def generate_pdf(protocol_id):
     """Generate PDF document from protocol"""
     from flask import send_file
     from .utils import generate_protocol_pdf
-    import tempfile
-    import re
     
-    protocol = Protocol.query.get_or_404(protocol_id)
+    protocol = _load_protocol_or_404(protocol_id)
     
-    # Create filename from participants and date
-    participants_names = []
-    for participant in protocol.participants[:3]:  # Max 3 names
-        # Get last name (last word in name)
-        name_parts = participant.name.strip().split()
-        if name_parts:
-            participants_names.append(name_parts[-1])
+    filename = _pdf_download_name((p.name for p in protocol.participants), protocol.date)
     
-    # Format date
-    date_str = protocol.date.strftime('%Y%m%d')
+    # Generate PDF in memory - nothing is left behind on disk
+    buffer = io.BytesIO()
+    try:
+        generate_protocol_pdf(protocol, buffer)
+    except Exception as e:
+        # Error page in this response instead of a redirect round-trip
+        current_app.logger.exception('PDF generation failed for protocol %s', protocol_id)
+        return render_template(
+            'error.html',
+            title='Błąd podczas generowania PDF',
+            message=str(e),
+            back_url=url_for('main.view_protocol', protocol_id=protocol_id)
+        ), 500
     
-    # Create filename
-    if participants_names:
-        filename = f"Protokol_{'-'.join(participants_names)}_{date_str}.pdf"
-    else:
-        filename = f"Protokol_{date_str}.pdf"
+    buffer.seek(0)
+    return send_file(
+        buffer,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
+
+# Background PDF exports (job_id -> (Future, filename)), oldest dropped past the limit
+_pdf_jobs = OrderedDict()
+_pdf_jobs_lock = threading.Lock()
+MAX_PDF_JOBS = 64
+
+def _render_protocol_pdf(app, protocol_id: int) -> bytes:
+    """Render protocol PDF in a worker thread and return the document bytes"""
+    from .utils import generate_protocol_pdf
     
-    # Remove special characters from filename
-    filename = re.sub(r'[^\w\s-]', '', filename)
-    filename = re.sub(r'[-\s]+', '_', filename)
+    with app.app_context():
+        protocol = _load_protocol_or_404(protocol_id)
+        buffer = io.BytesIO()
+        generate_protocol_pdf(protocol, buffer)
+        return buffer.getvalue()
+
+@bp.route('/api/protocol/<int:protocol_id>/pdf', methods=['POST'])
+def start_pdf_job(protocol_id):
+    """
+    API: Zleca wygenerowanie PDF w tle i zwraca job_id
+    Body (opcjonalne): {"socket_id": "..."} - powiadomienie 'pdf_ready' przez WebSocket
+    """
+    session = get_reader_session()
+    protocol_date = session.execute(
+        select(Protocol.date).where(Protocol.id == protocol_id)
+    ).scalar_one_or_none()
+    if protocol_date is None:
+        abort(404)
     
-    # Generate PDF in temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-    try:
-        generate_protocol_pdf(protocol, temp_file.name)
-        return send_file(
-            temp_file.name,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
-    except Exception as e:
-        flash(f'Błąd podczas generowania PDF: {str(e)}', 'error')
-        return redirect(url_for('main.view_protocol', protocol_id=protocol_id))
+    # Nazwa pliku z wąskiego zapytania - protokół ładuje dopiero zadanie w tle
+    names = session.execute(
+        select(Participant.name)
+        .where(Participant.protocol_id == protocol_id)
+        .order_by(Participant.id)
+        .limit(3)
+    ).scalars()
+    filename = _pdf_download_name(names, protocol_date)
+    
+    job_id = uuid.uuid4().hex
+    future = current_app.extensions['pdf_executor'].submit(
+        _render_protocol_pdf, current_app._get_current_object(), protocol_id
+    )
+    with _pdf_jobs_lock:
+        _pdf_jobs[job_id] = (future, filename)
+        while len(_pdf_jobs) > MAX_PDF_JOBS:
+            _pdf_jobs.popitem(last=False)
+    
+    socket_id = (request.get_json(silent=True) or {}).get('socket_id')
+    if socket_id:
+        future.add_done_callback(lambda f: socketio.emit('pdf_ready', {
+            'job_id': job_id,
+            'success': f.exception() is None
+        }, room=socket_id))
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('main.pdf_status', job_id=job_id)
+    }), 202
+
+@bp.route('/api/pdf-status/<job_id>')
+def pdf_status(job_id):
+    """
+    API: Status zadania generowania PDF
+    """
+    with _pdf_jobs_lock:
+        job = _pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Nieznane zadanie'
+        }), 404
+    
+    future, _ = job
+    if not future.done():
+        return jsonify({'success': True, 'status': 'pending'}), 202
+    
+    error = future.exception()
+    if error is not None:
+        with _pdf_jobs_lock:
+            _pdf_jobs.pop(job_id, None)
+        return jsonify({
+            'success': False,
+            'status': 'error',
+            'message': f'Błąd podczas generowania PDF: {str(error)}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'status': 'done',
+        'download_url': url_for('main.download_pdf', job_id=job_id)
+    })
+
+@bp.route('/api/pdf/<job_id>')
+def download_pdf(job_id):
+    """
+    API: Pobiera gotowy PDF - zadanie jest usuwane po pobraniu
+    """
+    from flask import send_file
+    
+    with _pdf_jobs_lock:
+        job = _pdf_jobs.get(job_id)
+        if job is None or not job[0].done() or job[0].exception() is not None:
+            abort(404)
+        del _pdf_jobs[job_id]
+    
+    future, filename = job
+    return send_file(
+        io.BytesIO(future.result()),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
 
 @bp.route('/protocol/<int:protocol_id>/delete', methods=['POST'])
 def delete_protocol(protocol_id):
     """Delete a protocol"""
     try:
-        protocol = Protocol.query.get_or_404(protocol_id)
-        db.session.delete(protocol)
+        # Single DELETE - participants, agenda and action items go with it via ON DELETE CASCADE
+        # (older databases get the CASCADE foreign keys from `flask init-db`, see upgrade_db)
+        result = db.session.execute(delete(Protocol).where(Protocol.id == protocol_id))
         db.session.commit()
-        flash('Protokół został usunięty.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Błąd podczas usuwania protokołu: {str(e)}', 'error')
+        return redirect(url_for('main.index'))
+    
+    if result.rowcount == 0:
+        abort(404)
     
+    flash('Protokół został usunięty.', 'success')
     return redirect(url_for('main.index'))
 
+def _submit_transcription_job(socket_id: str, job, *args):
+    """
+    Uruchamia zadanie transkrypcji w tle i zwraca odpowiedź 202 z job_id
+    
+    Wynik zadania (słownik odpowiedzi i kod HTTP) jest wysyłany przez
+    WebSocket zdarzeniem 'transcription_done' do pokoju klienta socket_id.
+    """
+    job_id = uuid.uuid4().hex
+    executor = current_app.extensions['transcription_executor']
+    
+    def run():
+        try:
+            payload, status = job(*args)
+        except Exception as e:
+            payload, status = {
+                'success': False,
+                'message': f'Błąd serwera: {str(e)}'
+            }, 500
+        payload['job_id'] = job_id
+        payload['status'] = status
+        socketio.emit('transcription_done', payload, room=socket_id)
+    
+    executor.submit(run)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'message': 'Zadanie transkrypcji przyjęte'
+    }), 202
+
+def _record_speech_job(chunk_duration):
+    """Nagrywa i transkrybuje krótki fragment mowy, zwraca (odpowiedź, kod HTTP)"""
+    # Procesor bez poleceń głosowych z puli
+    with speech_processor(enable_voice_commands=False) as processor:
+        # Nagrywanie i transkrypcja krótkiego fragmentu
+        result = processor.record_and_transcribe(
+            duration=chunk_duration,
+            save_audio=True,
+            apply_corrections=False  # Wyłącz korekty dla szybkości
+        )
+    
+    if result['success']:
+        return {
+            'success': True,
+            'text': result['text'],
+            'audio_path': result['audio_path'],
+            'message': 'Fragment przetworzony pomyślnie'
+        }, 200
+    else:
+        return {
+            'success': False,
+            'errors': result['errors'],
+            'message': 'Błąd podczas transkrypcji'
+        }, 400
+
 @bp.route('/api/record-speech', methods=['POST'])
 def record_speech():
     """
@@ -215,37 +565,21 @@ def record_speech():
     Parametry POST:
         - chunk_duration: Długość fragmentu w sekundach (domyślnie 5s)
         - field: Pole do którego ma być wpisany tekst (opcjonalny)
+        - socket_id: ID połączenia WebSocket - jeśli podane, transkrypcja
+          odbywa się w tle, a wynik przychodzi zdarzeniem 'transcription_done'
     """
     try:
         # Pobierz parametry
         data = request.get_json() or {}
         chunk_duration = data.get('chunk_duration', 5)  # Krótkie fragmenty dla quasi-realtime
         field = data.get('field', 'general')
+        socket_id = data.get('socket_id')
         
-        # Utwórz procesor bez poleceń głosowych
-        processor = SpeechToTextProcessor(enable_voice_commands=False)
+        if socket_id:
+            return _submit_transcription_job(socket_id, _record_speech_job, chunk_duration)
         
-        # Nagrywanie i transkrypcja krótkiego fragmentu
-        result = processor.record_and_transcribe(
-            duration=chunk_duration,
-            save_audio=True,
-            apply_corrections=False  # Wyłącz korekty dla szybkości
-        )
-        processor.cleanup()
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'text': result['text'],
-                'audio_path': result['audio_path'],
-                'message': 'Fragment przetworzony pomyślnie'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'errors': result['errors'],
-                'message': 'Błąd podczas transkrypcji'
-            }), 400
+        payload, status = _record_speech_job(chunk_duration)
+        return jsonify(payload), status
     
     except Exception as e:
         return jsonify({
@@ -274,25 +608,15 @@ def transcribe_file():
                 'message': 'Nie wybrano pliku'
             }), 400
         
-        # Zapisz plik tymczasowo
-        upload_dir = 'uploads'
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        filename = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        filepath = os.path.join(upload_dir, filename)
-        file.save(filepath)
-        
-        # Transkrypcja
-        processor = SpeechToTextProcessor()
-        result = processor.transcribe_from_file(
-            file_path=filepath,
-            apply_corrections=True
-        )
-        processor.cleanup()
-        
-        # Usuń plik tymczasowy
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        # Transkrypcja bezpośrednio z przesłanych danych (bez zapisu na dysk)
+        # Nazwa od klienta trafia do logów i rozszerzenia pliku tymczasowego - oczyść ją
+        with speech_processor() as processor:
+            result = processor.transcribe_from_stream(
+                file.stream,
+                filename_hint=secure_filename(file.filename),
+                apply_corrections=True,
+                temp_dir=current_app.config['UPLOAD_FOLDER']
+            )
         
         if result['success']:
             return jsonify({
@@ -313,6 +637,46 @@ def transcribe_file():
             'message': f'Błąd serwera: {str(e)}'
         }), 500
 
+def _voice_command_job(duration, process_commands):
+    """Nagrywa mowę i przetwarza polecenia głosowe, zwraca (odpowiedź, kod HTTP)"""
+    # Procesor z włączonymi poleceniami głosowymi z puli
+    with speech_processor(enable_voice_commands=True) as processor:
+        result = processor.record_and_transcribe(
+            duration=duration,
+            save_audio=True,
+            apply_corrections=True,
+            process_commands=process_commands
+        )
+        
+        if not result['success']:
+            return {
+                'success': False,
+                'errors': result['errors'],
+                'message': 'Błąd podczas przetwarzania'
+            }, 400
+        
+        response_data = {
+            'success': True,
+            'text': result['text'],
+            'audio_path': result['audio_path'],
+            'message': 'Przetwarzanie zakończone pomyślnie'
+        }
+        
+        # Dodaj informacje o poleceniu jeśli było wykryte
+        if result.get('command_info'):
+            cmd_info = result['command_info']
+            response_data['command_info'] = {
+                'is_command': cmd_info['is_command'],
+                'command_executed': cmd_info['command_executed'],
+                'message': cmd_info['message']
+            }
+            
+            # Pobierz aktualny tekst dokumentu
+            response_data['current_document'] = processor.get_current_document_text()
+            response_data['statistics'] = processor.get_document_statistics()
+        
+        return response_data, 200
+
 @bp.route('/api/voice-command', methods=['POST'])
 def voice_command():
     """
@@ -320,52 +684,20 @@ def voice_command():
     Parametry POST:
         - duration: Czas nagrywania w sekundach (opcjonalny)
         - process_commands: Czy przetwarzać polecenia głosowe (domyślnie true)
+        - socket_id: ID połączenia WebSocket - jeśli podane, przetwarzanie
+          odbywa się w tle, a wynik przychodzi zdarzeniem 'transcription_done'
     """
     try:
         data = request.get_json() or {}
         duration = data.get('duration', None)
         process_commands = data.get('process_commands', True)
+        socket_id = data.get('socket_id')
         
-        # Utwórz procesor z włączonymi poleceniami głosowymi
-        processor = SpeechToTextProcessor(enable_voice_commands=True)
-        
-        result = processor.record_and_transcribe(
-            duration=duration,
-            save_audio=True,
-            apply_corrections=True,
-            process_commands=process_commands
-        )
+        if socket_id:
+            return _submit_transcription_job(socket_id, _voice_command_job, duration, process_commands)
         
-        if result['success']:
-            response_data = {
-                'success': True,
-                'text': result['text'],
-                'audio_path': result['audio_path'],
-                'message': 'Przetwarzanie zakończone pomyślnie'
-            }
-            
-            # Dodaj informacje o poleceniu jeśli było wykryte
-            if result.get('command_info'):
-                cmd_info = result['command_info']
-                response_data['command_info'] = {
-                    'is_command': cmd_info['is_command'],
-                    'command_executed': cmd_info['command_executed'],
-                    'message': cmd_info['message']
-                }
-                
-                # Pobierz aktualny tekst dokumentu
-                response_data['current_document'] = processor.get_current_document_text()
-                response_data['statistics'] = processor.get_document_statistics()
-            
-            processor.cleanup()
-            return jsonify(response_data)
-        else:
-            processor.cleanup()
-            return jsonify({
-                'success': False,
-                'errors': result['errors'],
-                'message': 'Błąd podczas przetwarzania'
-            }), 400
+        payload, status = _voice_command_job(duration, process_commands)
+        return jsonify(payload), status
     
     except Exception as e:
         return jsonify({
@@ -380,8 +712,35 @@ def voice_commands_settings():
     """
     Strona ustawień poleceń głosowych
     """
-    config = VoiceCommandsConfig()
-    return render_template('voice_commands_settings.html', config=config)
+    response = make_response(render_template('voice_commands_settings.html'))
+    response.add_etag()
+    return response.make_conditional(request)
+
+# Pola konfiguracji dołączane do odpowiedzi po udanej zmianie
+_CONFIG_FIELDS = {
+    'trigger_word': VoiceCommandsConfig.get_trigger_word,
+    'commands': VoiceCommandsConfig.get_all_commands,
+}
+
+def _config_change_response(config, success: bool, message: str, *fields):
+    """
+    Buduje odpowiedź na operację zmieniającą konfigurację
+    
+    Args:
+        config: Konfiguracja (wywoływać wewnątrz bloku voice_config())
+        success, message: Wynik operacji
+        fields: Nazwy pól z _CONFIG_FIELDS dołączanych po sukcesie
+    """
+    if not success:
+        return jsonify({
+            'success': False,
+            'message': message
+        }), 400
+    
+    payload = {'success': True, 'message': message}
+    for field in fields:
+        payload[field] = _CONFIG_FIELDS[field](config)
+    return jsonify(payload)
 
 @bp.route('/api/voice-config', methods=['GET'])
 def get_voice_config():
@@ -389,14 +748,32 @@ def get_voice_config():
     API: Pobiera aktualną konfigurację poleceń głosowych
     """
     try:
-        config = VoiceCommandsConfig()
+        with voice_config() as config:
+            etag = config.get_etag()
+            last_modified = config.get_last_modified()
+            
+            # Konfiguracja bez zmian - odpowiedź 304 bez serializacji JSON
+            not_modified = (
+                request.if_none_match.contains(etag) if etag and request.if_none_match
+                else last_modified is not None and request.if_modified_since is not None
+                and last_modified.replace(microsecond=0) <= request.if_modified_since
+            )
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = jsonify({
+                    'success': True,
+                    'trigger_word': config.get_trigger_word(),
+                    'commands': config.get_all_commands(),
+                    'statistics': config.get_statistics()
+                })
         
-        return jsonify({
-            'success': True,
-            'trigger_word': config.get_trigger_word(),
-            'commands': config.get_all_commands(),
-            'statistics': config.get_statistics()
-        })
+        if etag:
+            response.set_etag(etag)
+        response.last_modified = last_modified
+        # Przeglądarka zawsze pyta serwer - bez heurystycznego cache na podstawie Last-Modified
+        response.cache_control.no_cache = True
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
@@ -419,20 +796,9 @@ def update_trigger_word():
                 'message': 'Brak parametru trigger_word'
             }), 400
         
-        config = VoiceCommandsConfig()
-        success, message = config.set_trigger_word(new_trigger)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'trigger_word': config.get_trigger_word()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.set_trigger_word(new_trigger)
+            return _config_change_response(config, success, message, 'trigger_word')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -454,26 +820,15 @@ def add_voice_command():
     try:
         data = request.get_json()
         
-        config = VoiceCommandsConfig()
-        success, message = config.add_command(
-            command_phrase=data.get('command_phrase'),
-            action=data.get('action'),
-            description=data.get('description', ''),
-            aliases=data.get('aliases', []),
-            enabled=data.get('enabled', True)
-        )
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'commands': config.get_all_commands()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.add_command(
+                command_phrase=data.get('command_phrase'),
+                action=data.get('action'),
+                description=data.get('description', ''),
+                aliases=data.get('aliases', []),
+                enabled=data.get('enabled', True)
+            )
+            return _config_change_response(config, success, message, 'commands')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -488,27 +843,16 @@ def update_voice_command(command_phrase):
     try:
         data = request.get_json()
         
-        config = VoiceCommandsConfig()
-        success, message = config.update_command(
-            command_phrase=command_phrase,
-            new_phrase=data.get('new_phrase'),
-            action=data.get('action'),
-            description=data.get('description'),
-            aliases=data.get('aliases'),
-            enabled=data.get('enabled')
-        )
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'commands': config.get_all_commands()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.update_command(
+                command_phrase=command_phrase,
+                new_phrase=data.get('new_phrase'),
+                action=data.get('action'),
+                description=data.get('description'),
+                aliases=data.get('aliases'),
+                enabled=data.get('enabled')
+            )
+            return _config_change_response(config, success, message, 'commands')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -521,20 +865,9 @@ def delete_voice_command(command_phrase):
     API: Usuwa polecenie
     """
     try:
-        config = VoiceCommandsConfig()
-        success, message = config.delete_command(command_phrase)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'commands': config.get_all_commands()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.delete_command(command_phrase)
+            return _config_change_response(config, success, message, 'commands')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -547,20 +880,9 @@ def toggle_voice_command(command_phrase):
     API: Przełącza status włączenia/wyłączenia polecenia
     """
     try:
-        config = VoiceCommandsConfig()
-        success, message = config.toggle_command(command_phrase)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'commands': config.get_all_commands()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.toggle_command(command_phrase)
+            return _config_change_response(config, success, message, 'commands')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -573,34 +895,20 @@ def reset_voice_config():
     API: Resetuje konfigurację do wartości domyślnych
     """
     try:
-        config = VoiceCommandsConfig()
-        success, message = config.reset_to_defaults()
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'trigger_word': config.get_trigger_word(),
-                'commands': config.get_all_commands()
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': message
-            }), 400
+        with voice_config() as config:
+            success, message = config.reset_to_defaults()
+            return _config_change_response(config, success, message, 'trigger_word', 'commands')
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Błąd: {str(e)}'
         }), 500
 
-
 # ================================================================================
 # WebSocket Handlers - Strumieniowe rozpoznawanie mowy
 # ================================================================================
 
 from flask_socketio import emit
-from .app import socketio
 from .streaming_recognition import StreamingRecognizer
 import logging
 
@@ -608,6 +916,82 @@ logger = logging.getLogger(__name__)
 
 # Słownik aktywnych sesji rozpoznawania (session_id -> recognizer)
 active_recognizers = {}
+_recognizers_lock = threading.Lock()
+
+# Limit równoczesnych sesji - każda trzyma mikrofon i własne wątki
+MAX_ACTIVE_RECOGNIZERS = 64
+
+def _replace_recognizer(session_id: str, recognizer: Optional[StreamingRecognizer] = None) -> bool:
+    """
+    Podmienia (lub usuwa) rozpoznawanie sesji i zatrzymuje poprzednie
+    
+    Podmiana w słowniku jest atomowa, więc równoległe rozłączenie i ponowny
+    start tej samej sesji nie zatrzymają jednego rozpoznawania dwukrotnie.
+    
+    Returns:
+        True jeśli sesja miała aktywne rozpoznawanie
+    """
+    with _recognizers_lock:
+        if (recognizer is not None and session_id not in active_recognizers
+                and len(active_recognizers) >= MAX_ACTIVE_RECOGNIZERS):
+            raise RuntimeError('Osiągnięto limit jednoczesnych nagrań')
+        previous = active_recognizers.pop(session_id, None)
+        if recognizer is not None:
+            active_recognizers[session_id] = recognizer
+    
+    if previous is not None:
+        try:
+            previous.stop()
+        except Exception as e:
+            logger.error(f"Błąd podczas zatrzymywania rozpoznawania: {e}")
+    return previous is not None
+
+class _RecognitionSender:
+    """
+    Wysyła wyniki rozpoznawania do klienta, łącząc częściowe wyniki z krótkiego okna
+    
+    Klient dopisuje każdy fragment do pola, więc fragmenty są sklejane, a nie
+    zastępowane - żaden tekst nie ginie. Wynik końcowy (także komunikat błędu)
+    wysyłany jest od razu, po zaległych fragmentach.
+    """
+    
+    WINDOW = 0.08  # Okno łączenia częściowych wyników w sekundach
+    
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self._pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+    
+    def __call__(self, text: str, is_final: bool):
+        if is_final:
+            self._flush()
+            self._emit(text, True)
+            return
+        
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        socketio.start_background_task(self._flush_later)
+    
+    def _flush_later(self):
+        socketio.sleep(self.WINDOW)
+        self._flush()
+    
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+        if pending:
+            self._emit(' '.join(pending), False)
+    
+    def _emit(self, text: str, is_final: bool):
+        socketio.emit('recognition_result', {
+            'text': text,
+            'is_final': is_final
+        }, room=self.session_id)
 
 @socketio.on('connect')
 def handle_connect():
@@ -620,9 +1004,7 @@ def handle_disconnect():
     """Klient rozłączył się"""
     logger.info(f"❌ Klient rozłączony: {request.sid}")
     # Zatrzymaj rozpoznawanie jeśli było aktywne
-    if request.sid in active_recognizers:
-        active_recognizers[request.sid].stop()
-        del active_recognizers[request.sid]
+    _replace_recognizer(request.sid)
 
 @socketio.on('start_recording')
 def handle_start_recording(data):
@@ -636,21 +1018,9 @@ def handle_start_recording(data):
         
         logger.info(f"🎤 Rozpoczynam nagrywanie dla sesji: {session_id}")
         
-        # Jeśli już trwa nagrywanie dla tej sesji, zatrzymaj je
-        if session_id in active_recognizers:
-            active_recognizers[session_id].stop()
-            del active_recognizers[session_id]
-        
-        # Funkcja callback do wysyłania rozpoznanego tekstu
-        def send_recognition(text: str, is_final: bool):
-            socketio.emit('recognition_result', {
-                'text': text,
-                'is_final': is_final
-            }, room=session_id)
-        
-        # Utwórz i uruchom rozpoznawanie
-        recognizer = StreamingRecognizer(callback=send_recognition, language=language)
-        active_recognizers[session_id] = recognizer
+        # Utwórz i uruchom rozpoznawanie - trwające nagrywanie tej sesji zostanie zatrzymane
+        recognizer = StreamingRecognizer(callback=_RecognitionSender(session_id), language=language)
+        _replace_recognizer(session_id, recognizer)
         recognizer.start()
         
         emit('recording_started', {'message': 'Nagrywanie rozpoczęte'})
@@ -667,9 +1037,7 @@ def handle_stop_recording():
         
         logger.info(f"⏹️ Zatrzymuję nagrywanie dla sesji: {session_id}")
         
-        if session_id in active_recognizers:
-            active_recognizers[session_id].stop()
-            del active_recognizers[session_id]
+        if _replace_recognizer(session_id):
             emit('recording_stopped', {'message': 'Nagrywanie zatrzymane'})
         else:
             emit('error', {'message': 'Brak aktywnego nagrywania'})
@@ -5,30 +5,299 @@ Główny moduł do rozpoznawania mowy i automatycznej transkrypcji z interpunkcj
 
 import speech_recognition as sr
 import language_tool_python
+import atexit
+import io
 import os
 import re
-from typing import Optional, Tuple
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, BinaryIO
 from datetime import datetime
 import logging
+from math import gcd
 from .voice_commands import VoiceCommandProcessor
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Próba załadowania faster-whisper (CTranslate2 z kwantyzacją - kilkukrotnie szybszy)
+try:
+    import ctranslate2
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+# Wsadowe dekodowanie fragmentów VAD (faster-whisper >= 1.1)
+try:
+    from faster_whisper import BatchedInferencePipeline
+    BATCHED_WHISPER_AVAILABLE = True
+except ImportError:
+    BATCHED_WHISPER_AVAILABLE = False
+
 # Próba załadowania Whisper
 try:
     import whisper
-    WHISPER_AVAILABLE = True
+    OPENAI_WHISPER_AVAILABLE = True
+except ImportError:
+    OPENAI_WHISPER_AVAILABLE = False
+
+# Odczyt WAV/FLAC/OGG w procesie, bez uruchamiania ffmpeg (opcjonalnie)
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+try:
+    from scipy.signal import resample_poly
+    RESAMPLE_AVAILABLE = True
 except ImportError:
-    WHISPER_AVAILABLE = False
+    RESAMPLE_AVAILABLE = False
+
+WHISPER_AVAILABLE = FASTER_WHISPER_AVAILABLE or OPENAI_WHISPER_AVAILABLE
+if not WHISPER_AVAILABLE:
     logger.warning("OpenAI Whisper nie jest dostępny - używaj tylko Google Speech Recognition")
 
+# Formułki z napisów filmowych, które Whisper "słyszy" w ciszy i szumie
+_HALLUCINATION_PHRASES = re.compile(
+    r"(?i)\b(?:thanks for watching|subscribe to (?:my|our) channel"
+    r"|napisy stworzone przez społeczność amara\.org"
+    r"|subtitles by .*?(?=[.!?](?:\s|$)|$))[.!?]?\s*"
+)
+
+
+def _ffmpeg_decode(source: str, data: Optional[bytes], sample_rate: int) -> bytes:
+    """Uruchamia ffmpeg i zwraca surowe próbki PCM s16le (mono)"""
+    cmd = [
+        'ffmpeg', '-threads', '0',
+        '-i', source,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate),
+        '-'
+    ]
+    return subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+
+def decode_audio_bytes(
+    data: bytes,
+    sample_rate: int = 16000,
+    suffix: str = '',
+    temp_dir: Optional[str] = None
+):
+    """
+    Dekoduje dane audio z pamięci do tablicy float32 (mono) dla Whisper
+    
+    Odpowiednik whisper.load_audio, ale ffmpeg czyta dane ze standardowego
+    wejścia zamiast z pliku na dysku. Formaty wymagające przewijania
+    (mp4/m4a/mov z indeksem na końcu) dekodowane są z pliku tymczasowego.
+    
+    Args:
+        data: Zawartość pliku audio w dowolnym formacie obsługiwanym przez ffmpeg
+        sample_rate: Docelowa częstotliwość próbkowania
+        suffix: Rozszerzenie pliku tymczasowego (np. '.m4a')
+        temp_dir: Katalog na plik tymczasowy (domyślnie systemowy)
+    
+    Returns:
+        Tablica numpy float32 z próbkami w zakresie [-1, 1]
+    """
+    import numpy as np
+    
+    try:
+        out = _ffmpeg_decode('pipe:0', data, sample_rate)
+    except subprocess.CalledProcessError:
+        with tempfile.NamedTemporaryFile(dir=temp_dir, suffix=suffix, delete=False) as tmp:
+            tmp.write(data)
+        try:
+            out = _ffmpeg_decode(tmp.name, None, sample_rate)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Nie udało się zdekodować audio: {e.stderr.decode(errors='ignore')}") from e
+        finally:
+            os.unlink(tmp.name)
+    
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+def load_audio_file(path: str, sample_rate: int = 16000):
+    """
+    Wczytuje plik audio do tablicy float32 (mono) dla Whisper
+    
+    Formaty obsługiwane przez soundfile są dekodowane w procesie (z ewentualnym
+    przepróbkowaniem przez scipy), pozostałe - przez ffmpeg, jak whisper.load_audio.
+    
+    Args:
+        path: Ścieżka do pliku audio
+        sample_rate: Docelowa częstotliwość próbkowania
+    
+    Returns:
+        Tablica numpy float32 z próbkami w zakresie [-1, 1]
+    """
+    import numpy as np
+    
+    if SOUNDFILE_AVAILABLE:
+        try:
+            data, file_rate = soundfile.read(path, dtype='float32', always_2d=True)
+        except RuntimeError:
+            # Format nieobsługiwany przez libsndfile (np. mp3, m4a)
+            data, file_rate = None, None
+        
+        if data is not None and (file_rate == sample_rate or RESAMPLE_AVAILABLE):
+            data = data.mean(axis=1)
+            if file_rate != sample_rate:
+                divisor = gcd(sample_rate, file_rate)
+                data = resample_poly(data, sample_rate // divisor, file_rate // divisor)
+            return data.astype(np.float32, copy=False)
+    
+    try:
+        out = _ffmpeg_decode(path, None, sample_rate)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Nie udało się zdekodować audio: {e.stderr.decode(errors='ignore')}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def remove_repeated_ngrams(text: str, max_n: int = 5, max_repeats: int = 2) -> str:
+    """
+    Usuwa pętle halucynacji Whisper - n-gramy powtórzone wielokrotnie z rzędu
+    
+    Fragment powtórzony więcej niż max_repeats razy pod rząd zostaje
+    zastąpiony jednym wystąpieniem; naturalne powtórzenia ("bardzo bardzo")
+    pozostają bez zmian. Wycinane są tylko powtórzone zakresy - reszta
+    tekstu (z odstępami i nowymi liniami) zostaje nienaruszona.
+    
+    Args:
+        text: Transkrypcja
+        max_n: Najdłuższy sprawdzany n-gram (w słowach)
+        max_repeats: Dopuszczalna liczba kolejnych powtórzeń
+    
+    Returns:
+        Tekst bez zapętlonych powtórzeń
+    """
+    tokens = list(re.finditer(r'\S+', text))
+    words = [token.group() for token in tokens]
+    pieces = []
+    kept_from = 0
+    i = 0
+    while i < len(words):
+        skip = 0
+        for n in range(1, max_n + 1):
+            gram = words[i:i + n]
+            if len(gram) < n:
+                break
+            repeats = 1
+            while words[i + repeats * n:i + (repeats + 1) * n] == gram:
+                repeats += 1
+            if repeats > max_repeats:
+                skip = repeats * n
+                break
+        if skip:
+            # Zostaje pierwsze wystąpienie, kolejne aż do końca pętli są wycinane
+            pieces.append(text[kept_from:tokens[i + n - 1].end()])
+            kept_from = tokens[i + skip - 1].end()
+            i += skip
+        else:
+            i += 1
+    if not pieces:
+        return text
+    pieces.append(text[kept_from:])
+    return ''.join(pieces)
+
+def _compile_whisper_model(model):
+    """
+    Kompiluje enkoder openai-whisper przez torch.compile (tylko GPU, opcjonalnie)
+    
+    Włączane zmienną PROTOKOLANT_TORCH_COMPILE=1. Kompilowany jest tylko
+    enkoder - dostaje zawsze 30-sekundowe okno o stałym kształcie, a dekoder
+    ze zmienną długością sekwencji byłby rekompilowany przy każdym nowym
+    kształcie. Pierwsze wywołanie po kompilacji trwa długo, dlatego model jest
+    od razu rozgrzewany fragmentem ciszy. Przy błędzie model zostaje
+    w wersji niekompilowanej.
+    """
+    if os.environ.get('PROTOKOLANT_TORCH_COMPILE') != '1':
+        return
+    import numpy as np
+    import torch
+    if not hasattr(torch, 'compile') or not torch.cuda.is_available():
+        return
+    
+    encoder = model.encoder
+    try:
+        logger.info("Kompilacja enkodera Whisper (torch.compile)...")
+        model.encoder = torch.compile(encoder)
+        model.transcribe(np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32), language='pl', fp16=False)
+    except Exception as e:
+        logger.warning(f"Kompilacja modelu Whisper nieudana: {e}")
+        model.encoder = encoder
+
+def load_whisper_model(name: str = "base"):
+    """
+    Ładuje model Whisper
+    
+    Preferowany jest faster-whisper: na GPU wagi int8 z obliczeniami float16,
+    na CPU int8 na wszystkich rdzeniach. Bez niego używany jest openai-whisper.
+    
+    Args:
+        name: Nazwa modelu (np. "base", "small")
+    
+    Returns:
+        Tuple (model, czy_faster_whisper)
+    """
+    if FASTER_WHISPER_AVAILABLE:
+        if ctranslate2.get_cuda_device_count() > 0:
+            return WhisperModel(name, device='cuda', compute_type='int8_float16'), True
+        # Na CPU wagi int8 (mniej danych z pamięci, szybkie mnożenie VNNI/AVX-512)
+        return WhisperModel(
+            name,
+            device='cpu',
+            compute_type='int8',
+            cpu_threads=os.cpu_count() or 0
+        ), True
+    model = whisper.load_model(name)
+    _compile_whisper_model(model)
+    return model, False
+
+# Modele Whisper współdzielone przez wszystkie procesory w procesie (nazwa -> model)
+_whisper_models = {}
+_whisper_models_lock = threading.Lock()
+# openai-whisper trzyma stan dekodowania (kv-cache) w modelu - jedno wywołanie naraz
+_openai_whisper_lock = threading.Lock()
+
+def get_whisper_model(name: str = "base"):
+    """
+    Zwraca model Whisper współdzielony w procesie, ładując go przy pierwszym użyciu
+    
+    Każdy procesor mowy korzysta z tej samej instancji, więc kilka procesorów
+    (np. w puli) nie trzyma w pamięci kilku kopii modelu.
+    
+    Args:
+        name: Nazwa modelu (np. "base", "small")
+    
+    Returns:
+        Tuple (model, czy_faster_whisper)
+    """
+    with _whisper_models_lock:
+        if name not in _whisper_models:
+            _whisper_models[name] = load_whisper_model(name)
+        return _whisper_models[name]
+
 class SpeechToTextProcessor:
     """
     Klasa do przetwarzania mowy na tekst z automatyczną korektą ortografii i interpunkcji
     """
     
+    # Liczba fragmentów dekodowanych razem przez BatchedInferencePipeline
+    WHISPER_BATCH_SIZE = 16
+    # Krótkie wypowiedzi (polecenia, dyktowanie z mikrofonu) dekodowane są
+    # bez znaczników czasu i bez ponawiania z wyższą temperaturą
+    SHORT_UTTERANCE_SECONDS = 60
+    SHORT_UTTERANCE_OPTIONS = {'without_timestamps': True, 'temperature': 0.0}
+    
+    # Domyślny katalog nagrań z mikrofonu
+    RECORDINGS_DIR = 'recordings'
+    
+    # Maksymalna liczba zapamiętanych wyników korekty ortograficznej
+    GRAMMAR_CACHE_SIZE = 256
+    
     def __init__(self, language: str = 'pl-PL', use_whisper: bool = True, enable_voice_commands: bool = False):
         """
         Inicjalizacja procesora mowy
@@ -41,6 +310,11 @@ class SpeechToTextProcessor:
         self.language = language
         self.use_whisper = use_whisper
         self.recognizer = sr.Recognizer()
+        self.whisper_model = None
+        self.faster_whisper = False
+        self.batched_pipeline = None
+        # Próg energii z kalibracji szumu jest zapamiętywany w self.recognizer
+        self._noise_calibrated = False
         
         # System poleceń głosowych - WYŁĄCZONY
         self.enable_voice_commands = False
@@ -51,7 +325,10 @@ class SpeechToTextProcessor:
         if self.use_whisper and WHISPER_AVAILABLE:
             try:
                 logger.info("Ładowanie modelu Whisper...")
-                self.whisper_model = whisper.load_model("base")
+                self.whisper_model, self.faster_whisper = get_whisper_model("base")
+                if self.faster_whisper and BATCHED_WHISPER_AVAILABLE:
+                    # Fragmenty mowy z jednego nagrania dekodowane razem zamiast po kolei
+                    self.batched_pipeline = BatchedInferencePipeline(model=self.whisper_model)
                 logger.info("Model Whisper załadowany pomyślnie")
             except Exception as e:
                 logger.warning(f"Nie udało się załadować Whisper: {e}. Używam Google Speech Recognition.")
@@ -63,6 +340,9 @@ class SpeechToTextProcessor:
         # Lazy loading dla LanguageTool - będzie załadowany przy pierwszym użyciu
         self._grammar_tool = None
         self._grammar_tool_initialized = False
+        self._grammar_tool_lock = threading.Lock()
+        # Wyniki korekty dla powtarzających się tekstów (LRU)
+        self._grammar_cache = OrderedDict()
     
     @property
     def grammar_tool(self):
@@ -71,17 +351,136 @@ class SpeechToTextProcessor:
         Inicjalizuje narzędzie tylko przy pierwszym użyciu
         """
         if not self._grammar_tool_initialized:
-            try:
-                logger.info("Inicjalizacja narzędzia do korekty ortografii...")
-                self._grammar_tool = language_tool_python.LanguageTool('pl-PL')
-                logger.info("Narzędzie do korekty ortografii gotowe")
-            except Exception as e:
-                logger.error(f"Błąd inicjalizacji korekty ortografii: {e}")
-                self._grammar_tool = None
-            finally:
-                self._grammar_tool_initialized = True
+            # Blokada chroni przed uruchomieniem dwóch procesów Javy przy równoczesnym pierwszym użyciu
+            with self._grammar_tool_lock:
+                if not self._grammar_tool_initialized:
+                    try:
+                        logger.info("Inicjalizacja narzędzia do korekty ortografii...")
+                        self._grammar_tool = language_tool_python.LanguageTool('pl-PL')
+                        logger.info("Narzędzie do korekty ortografii gotowe")
+                    except Exception as e:
+                        logger.error(f"Błąd inicjalizacji korekty ortografii: {e}")
+                        self._grammar_tool = None
+                    finally:
+                        self._grammar_tool_initialized = True
         return self._grammar_tool
     
+    def _calibrate_noise(self, source):
+        """Mierzy poziom szumu tła przy pierwszym nagraniu, kolejne używają zapamiętanego progu"""
+        if not self._noise_calibrated:
+            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            self._noise_calibrated = True
+    
+    def recalibrate(self):
+        """Wymusza ponowny pomiar szumu tła przy następnym nagraniu (np. po zmianie otoczenia)"""
+        self._noise_calibrated = False
+    
+    def _capture_audio(self, duration: Optional[int] = None, chunk_duration: int = 5) -> sr.AudioData:
+        """Nagrywa fragment z mikrofonu i zwraca go jako sr.AudioData (bez zapisu)"""
+        with sr.Microphone() as source:
+            logger.info("Nasłuchiwanie... Proszę mówić.")
+            
+            # Kalibracja poziomu szumu (tylko przy pierwszym nagraniu)
+            self._calibrate_noise(source)
+            
+            # Nagrywanie krótkiego fragmentu (dla szybszej responsywności)
+            if duration and duration > 0:
+                logger.info(f"Nagrywanie przez {duration} sekund...")
+                return self.recognizer.record(source, duration=duration)
+            
+            # Domyślnie krótki fragment dla pseudo-streaming
+            logger.info(f"Nagrywanie fragmentu {chunk_duration}s...")
+            return self.recognizer.record(source, duration=chunk_duration)
+    
+    def _capture_phrases(self, duration: int):
+        """
+        Nagrywa kolejne wypowiedzi zakończone ciszą, łącznie przez duration sekund
+        
+        Yields:
+            sr.AudioData każdej zakończonej wypowiedzi
+        """
+        with sr.Microphone() as source:
+            logger.info("Nasłuchiwanie... Proszę mówić.")
+            self._calibrate_noise(source)
+            
+            logger.info(f"Nagrywanie przez {duration} sekund (transkrypcja w trakcie)...")
+            deadline = time.monotonic() + duration
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    yield self.recognizer.listen(source, timeout=remaining, phrase_time_limit=remaining)
+                except sr.WaitTimeoutError:
+                    return
+    
+    def _record_and_transcribe_phrases(self, duration: int) -> Tuple[Optional[sr.AudioData], bool, str]:
+        """
+        Nagrywa długą wypowiedź, transkrybując każdą zakończoną frazę w tle
+        
+        Rozpoznawanie trwa równolegle z nagrywaniem, więc wynik jest gotowy
+        chwilę po ostatniej frazie, a nie po czasie nagrania plus transkrypcji.
+        
+        Returns:
+            Tuple (całe_nagranie_lub_None, sukces, tekst_lub_komunikat_błędu)
+        """
+        phrases = []
+        futures = []
+        # Jeden wątek - model Whisper obsługuje frazy po kolei, w kolejności nagrania
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for phrase in self._capture_phrases(duration):
+                phrases.append(phrase)
+                phrase_seconds = len(phrase.frame_data) / (phrase.sample_rate * phrase.sample_width)
+                futures.append(executor.submit(
+                    self.transcribe_audio_bytes,
+                    phrase.get_raw_data(convert_rate=16000, convert_width=2),
+                    short_utterance=phrase_seconds <= self.SHORT_UTTERANCE_SECONDS
+                ))
+        
+        if not phrases:
+            return None, False, "Przekroczono limit czasu oczekiwania na mowę"
+        
+        audio = sr.AudioData(
+            b''.join(phrase.frame_data for phrase in phrases),
+            phrases[0].sample_rate,
+            phrases[0].sample_width
+        )
+        
+        texts = []
+        error = None
+        for future in futures:
+            success, text_or_error = future.result()
+            if success:
+                if text_or_error:
+                    texts.append(text_or_error)
+            else:
+                error = text_or_error
+        
+        if not texts and error:
+            return audio, False, error
+        text = ' '.join(texts)
+        # Pętla halucynacji może przechodzić przez granice fraz
+        if self.use_whisper:
+            text = remove_repeated_ngrams(text)
+        return audio, True, text
+    
+    def _save_recording(self, audio: sr.AudioData, save_path: Optional[str] = None) -> str:
+        """Zapisuje nagranie jako WAV i zwraca ścieżkę pliku"""
+        if save_path:
+            save_dir = os.path.dirname(save_path)
+            if save_dir:
+                os.makedirs(save_dir, exist_ok=True)
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            save_path = os.path.join(self.RECORDINGS_DIR, f"recording_{timestamp}.wav")
+            os.makedirs(self.RECORDINGS_DIR, exist_ok=True)
+        
+        with open(save_path, 'wb') as f:
+            f.write(audio.get_wav_data())
+        
+        logger.info(f"Nagranie zapisane: {save_path}")
+        return save_path
+    
     def record_audio(self, duration: Optional[int] = None, save_path: Optional[str] = None, chunk_duration: int = 5) -> Tuple[bool, str]:
         """
         Nagrywa dźwięk z mikrofonu w krótkich fragmentach
@@ -95,34 +494,8 @@ class SpeechToTextProcessor:
             Tuple (sukces, ścieżka_do_pliku_lub_komunikat_błędu)
         """
         try:
-            with sr.Microphone() as source:
-                logger.info("Nasłuchiwanie... Proszę mówić.")
-                
-                # Kalibracja poziomu szumu
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                # Nagrywanie krótkiego fragmentu (dla szybszej responsywności)
-                if duration and duration > 0:
-                    logger.info(f"Nagrywanie przez {duration} sekund...")
-                    audio = self.recognizer.record(source, duration=duration)
-                else:
-                    # Domyślnie krótki fragment dla pseudo-streaming
-                    logger.info(f"Nagrywanie fragmentu {chunk_duration}s...")
-                    audio = self.recognizer.record(source, duration=chunk_duration)
-                
-                # Zapis do pliku
-                if save_path:
-                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                else:
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    save_path = f"recordings/recording_{timestamp}.wav"
-                    os.makedirs('recordings', exist_ok=True)
-                
-                with open(save_path, 'wb') as f:
-                    f.write(audio.get_wav_data())
-                
-                logger.info(f"Nagranie zapisane: {save_path}")
-                return True, save_path
+            audio = self._capture_audio(duration, chunk_duration)
+            return True, self._save_recording(audio, save_path)
         
         except sr.WaitTimeoutError:
             return False, "Przekroczono limit czasu oczekiwania na mowę"
@@ -130,12 +503,34 @@ class SpeechToTextProcessor:
             logger.error(f"Błąd podczas nagrywania: {e}")
             return False, str(e)
     
-    def transcribe_audio(self, audio_path: str) -> Tuple[bool, str]:
+    def _audio_to_model_device(self, audio):
+        """
+        Przygotowuje nagranie dla openai-whisper
+        
+        Ścieżka jest dekodowana przez load_audio_file (bez ffmpeg dla WAV/FLAC/OGG).
+        Na GPU próbki są przenoszone jednym kopiowaniem - spektrogram mel liczony
+        jest wtedy na GPU, zamiast kopiować go z CPU osobno dla każdego
+        30-sekundowego okna dekodowania.
+        """
+        import numpy as np
+        import torch
+        
+        if isinstance(audio, str):
+            audio = load_audio_file(audio)
+        
+        device = self.whisper_model.device
+        if device.type != 'cuda' or not isinstance(audio, np.ndarray):
+            return audio
+        return torch.from_numpy(audio).pin_memory().to(device, non_blocking=True)
+    
+    def transcribe_audio(self, audio_path, short_utterance: bool = False) -> Tuple[bool, str]:
         """
         Transkrybuje plik audio na tekst
         
         Args:
-            audio_path: Ścieżka do pliku audio
+            audio_path: Ścieżka do pliku audio lub dane w pamięci
+                        (tablica numpy dla Whisper, obiekt plikowy dla Google)
+            short_utterance: Szybsze dekodowanie Whisper dla krótkich wypowiedzi
         
         Returns:
             Tuple (sukces, tekst_lub_komunikat_błędu)
@@ -144,13 +539,48 @@ class SpeechToTextProcessor:
             if self.use_whisper:
                 # Użyj Whisper AI (lepsza jakość i automatyczna interpunkcja)
                 logger.info("Transkrypcja za pomocą Whisper AI...")
-                result = self.whisper_model.transcribe(
-                    audio_path, 
-                    language='pl',
-                    task='transcribe',
-                    fp16=False
-                )
-                text = result['text'].strip()
+                decode_options = self.SHORT_UTTERANCE_OPTIONS if short_utterance else {}
+                if self.batched_pipeline is not None:
+                    # Fragmenty wyznaczone przez VAD dekodowane wsadowo
+                    segments, _ = self.batched_pipeline.transcribe(
+                        audio_path,
+                        language='pl',
+                        task='transcribe',
+                        beam_size=1,
+                        batch_size=self.WHISPER_BATCH_SIZE,
+                        **decode_options
+                    )
+                    text = ''.join(segment.text for segment in segments).strip()
+                elif self.faster_whisper:
+                    # Segmenty są generowane leniwie - dekodowanie trwa podczas iteracji
+                    segments, _ = self.whisper_model.transcribe(
+                        audio_path,
+                        language='pl',
+                        task='transcribe',
+                        beam_size=1,
+                        vad_filter=True,
+                        condition_on_previous_text=False,
+                        **decode_options
+                    )
+                    text = ''.join(segment.text for segment in segments).strip()
+                else:
+                    audio = self._audio_to_model_device(audio_path)
+                    with _openai_whisper_lock:
+                        result = self.whisper_model.transcribe(
+                            audio, 
+                            language='pl',
+                            task='transcribe',
+                            fp16=False,
+                            condition_on_previous_text=False,
+                            **decode_options
+                        )
+                    text = result['text'].strip()
+                # Usuń halucynacje, które Whisper generuje na ciszy i szumie
+                text = _HALLUCINATION_PHRASES.sub('', text).strip()
+                # Pętle powtórzeń pojawiają się w długich nagraniach - krótkie
+                # wypowiedzi (i frazy, sprawdzane po złożeniu) zostają bez zmian
+                if not short_utterance:
+                    text = remove_repeated_ngrams(text)
                 logger.info("Transkrypcja zakończona pomyślnie")
                 return True, text
             else:
@@ -170,6 +600,38 @@ class SpeechToTextProcessor:
             logger.error(f"Błąd podczas transkrypcji: {e}")
             return False, str(e)
     
+    def transcribe_audio_bytes(
+        self,
+        pcm16_bytes: bytes,
+        sample_rate: int = 16000,
+        short_utterance: bool = False
+    ) -> Tuple[bool, str]:
+        """
+        Transkrybuje surowe próbki PCM16 (mono) bez zapisu i ponownego dekodowania pliku
+        
+        Args:
+            pcm16_bytes: Próbki 16-bitowe little-endian
+            sample_rate: Częstotliwość próbkowania (Whisper wymaga 16000 Hz)
+            short_utterance: Szybsze dekodowanie Whisper dla krótkich wypowiedzi
+        
+        Returns:
+            Tuple (sukces, tekst_lub_komunikat_błędu)
+        """
+        if self.use_whisper:
+            import numpy as np
+            audio = np.frombuffer(pcm16_bytes, np.int16).astype(np.float32) / 32768.0
+            return self.transcribe_audio(audio, short_utterance=short_utterance)
+        
+        # Google przyjmuje WAV - kodowanie odbywa się w pamięci
+        wav_data = sr.AudioData(pcm16_bytes, sample_rate, 2).get_wav_data()
+        return self.transcribe_audio(io.BytesIO(wav_data))
+    
+    def _cache_grammar_result(self, text: str, corrected_text: str):
+        """Zapamiętuje wynik korekty, usuwając najdawniej używane wpisy"""
+        self._grammar_cache[text] = corrected_text
+        if len(self._grammar_cache) > self.GRAMMAR_CACHE_SIZE:
+            self._grammar_cache.popitem(last=False)
+    
     def apply_grammar_corrections(self, text: str) -> str:
         """
         Aplikuje korekty ortograficzne i gramatyczne do tekstu
@@ -180,6 +642,10 @@ class SpeechToTextProcessor:
         Returns:
             Poprawiony tekst
         """
+        if text in self._grammar_cache:
+            self._grammar_cache.move_to_end(text)
+            return self._grammar_cache[text]
+        
         if not self.grammar_tool:
             logger.warning("Narzędzie do korekty ortografii niedostępne")
             return text
@@ -193,6 +659,7 @@ class SpeechToTextProcessor:
             if matches:
                 logger.info(f"Zastosowano {len(matches)} poprawek ortograficznych")
             
+            self._cache_grammar_result(text, corrected_text)
             return corrected_text
         
         except Exception as e:
@@ -226,10 +693,22 @@ class SpeechToTextProcessor:
         if not text.endswith(('.', '!', '?')):
             text += '.'
         
-        # Wielkie litery po kropkach
-        text = re.sub(r'\.(\s+)([a-ząćęłńóśźż])', lambda m: '.' + m.group(1) + m.group(2).upper(), text)
+        # Wielkie litery po końcu zdania - pętla tylko po znakach końca zdania
+        chars = None
+        length = len(text)
+        for stop in '.!?':
+            i = text.find(stop)
+            while i != -1:
+                j = i + 1
+                while j < length and text[j].isspace():
+                    j += 1
+                if i + 1 < j < length:
+                    if chars is None:
+                        chars = list(text)
+                    chars[j] = text[j].upper()
+                i = text.find(stop, i + 1)
         
-        return text
+        return ''.join(chars) if chars else text
     
     def record_and_transcribe(
         self, 
@@ -259,23 +738,35 @@ class SpeechToTextProcessor:
         }
         
         try:
-            # Krok 1: Nagrywanie
-            logger.info("=== ROZPOCZYNAM NAGRYWANIE ===")
-            success, audio_path_or_error = self.record_audio(
-                duration=duration,
-                save_path=None if save_audio else None
-            )
-            
-            if not success:
-                result['errors'].append(f"Nagrywanie: {audio_path_or_error}")
-                return result
-            
-            audio_path = audio_path_or_error
-            result['audio_path'] = audio_path
-            
-            # Krok 2: Transkrypcja
-            logger.info("=== ROZPOCZYNAM TRANSKRYPCJĘ ===")
-            success, text_or_error = self.transcribe_audio(audio_path)
+            if duration and duration > self.SHORT_UTTERANCE_SECONDS:
+                # Krok 1+2: Długie nagranie - frazy transkrybowane w trakcie nagrywania
+                logger.info("=== ROZPOCZYNAM NAGRYWANIE Z TRANSKRYPCJĄ ===")
+                audio, success, text_or_error = self._record_and_transcribe_phrases(duration)
+                if audio is None:
+                    result['errors'].append(f"Nagrywanie: {text_or_error}")
+                    return result
+                
+                if save_audio:
+                    result['audio_path'] = self._save_recording(audio)
+            else:
+                # Krok 1: Nagrywanie
+                logger.info("=== ROZPOCZYNAM NAGRYWANIE ===")
+                try:
+                    audio = self._capture_audio(duration=duration)
+                except sr.WaitTimeoutError:
+                    result['errors'].append("Nagrywanie: Przekroczono limit czasu oczekiwania na mowę")
+                    return result
+                
+                # Plik WAV tylko na potrzeby archiwum - transkrypcja korzysta z próbek w pamięci
+                if save_audio:
+                    result['audio_path'] = self._save_recording(audio)
+                
+                # Krok 2: Transkrypcja
+                logger.info("=== ROZPOCZYNAM TRANSKRYPCJĘ ===")
+                success, text_or_error = self.transcribe_audio_bytes(
+                    audio.get_raw_data(convert_rate=16000, convert_width=2),
+                    short_utterance=True
+                )
             
             if not success:
                 result['errors'].append(f"Transkrypcja: {text_or_error}")
@@ -317,11 +808,6 @@ class SpeechToTextProcessor:
             logger.info(f"=== ZAKOŃCZONO POMYŚLNIE ===")
             logger.info(f"Rozpoznany tekst: {text}")
             
-            # Opcjonalne: usuń plik audio jeśli nie ma być zapisany
-            if not save_audio and audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
-                result['audio_path'] = None
-            
             return result
         
         except Exception as e:
@@ -364,25 +850,78 @@ class SpeechToTextProcessor:
                 result['errors'].append(f"Transkrypcja: {text_or_error}")
                 return result
             
-            text = text_or_error
+            result['success'] = True
+            result['text'] = self._finalize_text(text_or_error, apply_corrections)
             
-            # Dodaj interpunkcję
-            text = self.add_punctuation(text)
+            return result
+        
+        except Exception as e:
+            logger.error(f"Błąd podczas transkrypcji pliku: {e}")
+            result['errors'].append(str(e))
+            return result
+    
+    def transcribe_from_stream(
+        self,
+        stream: BinaryIO,
+        filename_hint: Optional[str] = None,
+        apply_corrections: bool = True,
+        temp_dir: Optional[str] = None
+    ) -> dict:
+        """
+        Transkrybuje dane audio z obiektu plikowego bez zapisu na dysk
+        
+        Args:
+            stream: Obiekt plikowy z danymi audio (np. wgrany plik)
+            filename_hint: Oryginalna nazwa pliku (do logów i rozszerzenia)
+            apply_corrections: Czy zastosować korekty ortograficzne
+            temp_dir: Katalog na plik tymczasowy, gdy formatu nie da się
+                dekodować ze strumienia
+        
+        Returns:
+            Dict z kluczami: success, text, errors
+        """
+        result = {
+            'success': False,
+            'text': '',
+            'errors': []
+        }
+        
+        try:
+            data = stream.read()
+            if not data:
+                result['errors'].append("Pusty plik audio")
+                return result
             
-            # Korekta ortograficzna
-            if apply_corrections:
-                text = self.apply_grammar_corrections(text)
+            logger.info(f"Transkrypcja danych z pamięci: {filename_hint or 'strumień'}")
+            if self.use_whisper:
+                suffix = os.path.splitext(filename_hint or '')[1]
+                audio = decode_audio_bytes(data, suffix=suffix, temp_dir=temp_dir)
+            else:
+                audio = io.BytesIO(data)
+            
+            success, text_or_error = self.transcribe_audio(audio)
+            
+            if not success:
+                result['errors'].append(f"Transkrypcja: {text_or_error}")
+                return result
             
             result['success'] = True
-            result['text'] = text
+            result['text'] = self._finalize_text(text_or_error, apply_corrections)
             
             return result
         
         except Exception as e:
-            logger.error(f"Błąd podczas transkrypcji pliku: {e}")
+            logger.error(f"Błąd podczas transkrypcji strumienia: {e}")
             result['errors'].append(str(e))
             return result
     
+    def _finalize_text(self, text: str, apply_corrections: bool) -> str:
+        """Dodaje interpunkcję i opcjonalnie korektę ortograficzną do transkrypcji"""
+        text = self.add_punctuation(text)
+        if apply_corrections:
+            text = self.apply_grammar_corrections(text)
+        return text
+    
     def save_transcription_to_file(self, text: str, output_path: str) -> Tuple[bool, str]:
         """
         Zapisuje transkrypcję do pliku tekstowego
@@ -454,6 +993,20 @@ class SpeechToTextProcessor:
                 pass
 
 
+# Procesor współdzielony przez wywołania record_speech_to_text - model
+# Whisper i LanguageTool ładowane są raz na proces
+_shared_processor: Optional[SpeechToTextProcessor] = None
+_shared_processor_lock = threading.Lock()
+
+def _get_shared_processor() -> SpeechToTextProcessor:
+    """Zwraca współdzielony procesor, tworząc go przy pierwszym użyciu"""
+    global _shared_processor
+    with _shared_processor_lock:
+        if _shared_processor is None:
+            _shared_processor = SpeechToTextProcessor()
+            atexit.register(_shared_processor.cleanup)
+        return _shared_processor
+
 # Funkcja pomocnicza do łatwego użycia
 def record_speech_to_text(
     duration: Optional[int] = None,
@@ -473,7 +1026,7 @@ def record_speech_to_text(
     Returns:
         Dict z wynikami transkrypcji
     """
-    processor = SpeechToTextProcessor()
+    processor = _get_shared_processor()
     result = processor.record_and_transcribe(
         duration=duration,
         save_audio=save_audio,
@@ -486,7 +1039,6 @@ def record_speech_to_text(
         output_path = os.path.join(output_dir, f'transcription_{timestamp}.txt')
         processor.save_transcription_to_file(result['text'], output_path)
     
-    processor.cleanup()
     return result
 
 
@@ -6,12 +6,86 @@ Używa PyAudio do nagrywania i Google Speech Recognition API
 import pyaudio
 import speech_recognition as sr
 import threading
-import queue
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
+class AudioRingBuffer:
+    """
+    Bufor cykliczny na próbki audio o stałym rozmiarze
+    
+    Callback PyAudio dopisuje dane kopiowaniem wycinka do zaalokowanej
+    pamięci, a wątek rozpoznający odbiera wszystko, co się zebrało - bez
+    kolejki i bez sklejania bajtów przy każdym fragmencie.
+    """
+    
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: Pojemność bufora w bajtach
+        """
+        self._data = bytearray(capacity)
+        self._capacity = capacity
+        self._write_pos = 0
+        self._size = 0
+        # Próg, od którego budzony jest czytelnik - zapis mniejszych porcji go nie budzi
+        self._wanted = 1
+        self._interrupted = False
+        self._ready = threading.Condition()
+    
+    def write(self, chunk: bytes):
+        """Dopisuje dane; przy przepełnieniu nadpisuje najstarsze próbki"""
+        if len(chunk) > self._capacity:
+            chunk = chunk[-self._capacity:]
+        
+        with self._ready:
+            end = self._write_pos + len(chunk)
+            if end <= self._capacity:
+                self._data[self._write_pos:end] = chunk
+            else:
+                split = self._capacity - self._write_pos
+                self._data[self._write_pos:] = chunk[:split]
+                self._data[:end - self._capacity] = chunk[split:]
+            self._write_pos = end % self._capacity
+            
+            if self._size + len(chunk) > self._capacity:
+                logger.warning("Przepełnienie bufora audio - pominięto najstarsze próbki")
+            self._size = min(self._size + len(chunk), self._capacity)
+            if self._size >= self._wanted:
+                self._ready.notify()
+    
+    def interrupt(self):
+        """Przerywa oczekiwanie w read() (np. gotowy wynik rozpoznawania lub zatrzymanie)"""
+        with self._ready:
+            self._interrupted = True
+            self._ready.notify()
+    
+    def read(self, min_bytes: int, timeout: float) -> Optional[bytes]:
+        """
+        Zwraca wszystkie zebrane dane, gdy jest ich co najmniej min_bytes
+        
+        Returns:
+            Dane audio lub None, jeśli w czasie timeout nie zebrano dość próbek
+            albo oczekiwanie przerwano przez interrupt()
+        """
+        with self._ready:
+            self._wanted = min_bytes
+            self._ready.wait_for(lambda: self._size >= min_bytes or self._interrupted, timeout)
+            self._interrupted = False
+            if self._size < min_bytes:
+                return None
+            
+            start = (self._write_pos - self._size) % self._capacity
+            if start + self._size <= self._capacity:
+                data = bytes(self._data[start:start + self._size])
+            else:
+                data = bytes(self._data[start:]) + bytes(self._data[:self._write_pos])
+            self._size = 0
+            return data
+
 class StreamingRecognizer:
     """Klasa do strumieniowego rozpoznawania mowy"""
     
@@ -26,7 +100,7 @@ class StreamingRecognizer:
         self.callback = callback
         self.language = language
         self.is_running = False
-        self.audio_queue = queue.Queue()
+        self._stop_event = threading.Event()
         self.recognizer = sr.Recognizer()
         
         # Konfiguracja audio
@@ -35,6 +109,12 @@ class StreamingRecognizer:
         self.CHANNELS = 1
         self.RATE = 16000  # 16kHz dla lepszej jakości
         
+        # Maksymalna liczba równoczesnych zapytań do Google API
+        self.MAX_PENDING_REQUESTS = 4
+        
+        # Bufor na 30 s audio - nadmiar nadpisuje najstarsze próbki
+        self.audio_buffer = AudioRingBuffer(self.RATE * 2 * 30)
+        
         self.audio_interface = None
         self.stream = None
         self.recording_thread = None
@@ -43,7 +123,7 @@ class StreamingRecognizer:
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """Callback wywoływany przez PyAudio gdy dostępne są dane audio"""
         if self.is_running:
-            self.audio_queue.put(in_data)
+            self.audio_buffer.write(in_data)
         return (in_data, pyaudio.paContinue)
     
     def _recording_worker(self):
@@ -74,8 +154,9 @@ class StreamingRecognizer:
             logger.info("🎤 Rozpoczęto nagrywanie strumieniowe")
             
             # Czekaj aż nagrywanie się zakończy
-            while self.is_running and self.stream.is_active():
-                threading.Event().wait(0.1)
+            while self.stream.is_active():
+                if self._stop_event.wait(0.5):
+                    break
                 
         except Exception as e:
             logger.error(f"Błąd w wątku nagrywania: {e}")
@@ -83,56 +164,76 @@ class StreamingRecognizer:
         finally:
             self._cleanup_audio()
     
+    def _recognize_chunk(self, audio_bytes: bytes) -> Optional[str]:
+        """Rozpoznaje jeden fragment audio, zwraca tekst lub None gdy brak mowy"""
+        audio_data = sr.AudioData(audio_bytes, self.RATE, 2)
+        try:
+            text = self.recognizer.recognize_google(
+                audio_data,
+                language=self.language,
+                show_all=False
+            )
+        except sr.UnknownValueError:
+            return None
+        return text if text and text.strip() else None
+    
+    def _deliver_ready(self, pending: deque) -> bool:
+        """
+        Wysyła gotowe wyniki w kolejności nagrania
+        
+        Returns:
+            False gdy API zwróciło błąd i rozpoznawanie należy przerwać
+        """
+        while pending and pending[0].done():
+            try:
+                text = pending.popleft().result()
+            except sr.RequestError as e:
+                logger.error(f"Błąd API Google: {e}")
+                self.callback(f"Błąd połączenia: {e}", True)
+                return False
+            
+            if text:
+                logger.info(f"📝 Rozpoznano fragment: {text}")
+                # Wyślij częściowy wynik (is_final=False)
+                self.callback(text, False)
+        return True
+    
     def _recognition_worker(self):
-        """Wątek rozpoznający - przetwarza audio i wysyła do Google API"""
-        audio_buffer = b''
-        silence_threshold = 0.5  # 0.5 sekundy ciszy
+        """
+        Wątek rozpoznający - przetwarza audio i wysyła do Google API
+        
+        Fragmenty są wysyłane równolegle (do MAX_PENDING_REQUESTS naraz), więc
+        opóźnienie sieci nie blokuje zbierania kolejnych próbek. Wyniki trafiają
+        do callbacku w kolejności nagrania.
+        """
         min_audio_length = 1.0   # Minimum 1 sekunda audio do rozpoznania
+        min_buffer_bytes = int(self.RATE * 2 * min_audio_length)  # 2 bytes per sample
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.MAX_PENDING_REQUESTS)
         
         try:
             while self.is_running:
-                try:
-                    # Zbieraj audio przez krótki czas
-                    chunk_data = self.audio_queue.get(timeout=0.1)
-                    audio_buffer += chunk_data
-                    
-                    # Co ~2 sekundy audio, spróbuj rozpoznać
-                    buffer_duration = len(audio_buffer) / (self.RATE * 2)  # 2 bytes per sample
-                    
-                    if buffer_duration >= min_audio_length:
-                        # Utwórz AudioData z bufora
-                        audio_data = sr.AudioData(audio_buffer, self.RATE, 2)
-                        
-                        try:
-                            # Rozpoznaj fragment (partial result)
-                            text = self.recognizer.recognize_google(
-                                audio_data, 
-                                language=self.language,
-                                show_all=False
-                            )
-                            
-                            if text and text.strip():
-                                logger.info(f"📝 Rozpoznano fragment: {text}")
-                                # Wyślij częściowy wynik (is_final=False)
-                                self.callback(text, False)
-                                
-                                # Wyczyść bufor po rozpoznaniu
-                                audio_buffer = b''
-                                
-                        except sr.UnknownValueError:
-                            # Nie rozpoznano mowy - kontynuuj zbieranie
-                            pass
-                        except sr.RequestError as e:
-                            logger.error(f"Błąd API Google: {e}")
-                            self.callback(f"Błąd połączenia: {e}", True)
-                            break
-                            
-                except queue.Empty:
+                if not self._deliver_ready(pending):
+                    break
+                
+                # Przy komplecie zapytań w locie bufor rośnie dalej - kolejny fragment będzie dłuższy
+                if len(pending) >= self.MAX_PENDING_REQUESTS:
+                    wait_futures([pending[0]], timeout=1.0)
                     continue
+                
+                # Czeka na dane bez odpytywania - budzi go pełny fragment, gotowy wynik lub stop()
+                audio_bytes = self.audio_buffer.read(min_buffer_bytes, timeout=1.0)
+                if audio_bytes:
+                    future = executor.submit(self._recognize_chunk, audio_bytes)
+                    future.add_done_callback(lambda _: self.audio_buffer.interrupt())
+                    pending.append(future)
                     
         except Exception as e:
             logger.error(f"Błąd w wątku rozpoznawania: {e}")
             self.callback(f"Błąd rozpoznawania: {e}", True)
+        finally:
+            # Nie czekaj na zapytania w locie - po zatrzymaniu ich wyniki są zbędne
+            executor.shutdown(wait=False)
     
     def start(self):
         """Rozpocznij strumieniowe rozpoznawanie"""
@@ -141,6 +242,7 @@ class StreamingRecognizer:
             return
         
         self.is_running = True
+        self._stop_event.clear()
         
         # Uruchom wątek nagrywający
         self.recording_thread = threading.Thread(target=self._recording_worker, daemon=True)
@@ -159,6 +261,8 @@ class StreamingRecognizer:
         
         logger.info("⏹️ Zatrzymywanie rozpoznawania...")
         self.is_running = False
+        self._stop_event.set()
+        self.audio_buffer.interrupt()
         
         # Zaczekaj na zakończenie wątków
         if self.recording_thread and self.recording_thread.is_alive():
@@ -3,6 +3,9 @@ Utility functions for Protokolant application
 """
 
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+from typing import BinaryIO, Union
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
@@ -33,13 +36,13 @@ def format_datetime_polish(datetime_obj: datetime) -> str:
     """
     return datetime_obj.strftime('%d.%m.%Y %H:%M')
 
-def generate_protocol_pdf(protocol, filename: str) -> None:
+@lru_cache(maxsize=None)
+def _pdf_styles() -> dict:
     """
-    Generate PDF document from protocol
+    Register PDF fonts and build paragraph styles once per process
     
-    Args:
-        protocol: Protocol model instance
-        filename: Output filename for PDF
+    Returns:
+        Dict with font names and ParagraphStyle objects used by generate_protocol_pdf
     """
     from reportlab.pdfbase import pdfmetrics
     from reportlab.pdfbase.ttfonts import TTFont
@@ -69,46 +72,62 @@ def generate_protocol_pdf(protocol, filename: str) -> None:
         default_font = 'Helvetica'
         bold_font = 'Helvetica-Bold'
     
-    doc = SimpleDocTemplate(filename, pagesize=A4, leftMargin=2*cm, rightMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    story = []
     styles = getSampleStyleSheet()
+    normal = styles['Normal']
+    
+    return {
+        'default_font': default_font,
+        'bold_font': bold_font,
+        # Custom styles for Polish characters
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontName=bold_font,
+            fontSize=18,
+            textColor=colors.HexColor('#1e3a8a'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontName=bold_font,
+            fontSize=14,
+            textColor=colors.HexColor('#1e3a8a'),
+            spaceAfter=12,
+            spaceBefore=12
+        ),
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=normal,
+            fontName=default_font,
+            fontSize=11,
+            leading=14
+        ),
+        # Bullet lists laid out as a single table of paragraph cells
+        'list': TableStyle([
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ]),
+    }
+
+def generate_protocol_pdf(protocol, output: Union[str, BinaryIO]) -> None:
+    """
+    Generate PDF document from protocol
+    
+    Args:
+        protocol: Protocol model instance
+        output: Output filename or writable binary file object for PDF
+    """
+    pdf_styles = _pdf_styles()
+    bold_font = pdf_styles['bold_font']
+    title_style = pdf_styles['title']
+    heading_style = pdf_styles['heading']
+    normal_style = pdf_styles['normal']
     
-    # Custom styles for Polish characters
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=bold_font,
-        fontSize=18,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontName=bold_font,
-        fontSize=14,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=default_font,
-        fontSize=11,
-        leading=14
-    )
-    
-    bold_normal_style = ParagraphStyle(
-        'CustomBold',
-        parent=styles['Normal'],
-        fontName=bold_font,
-        fontSize=11,
-        leading=14
-    )
+    doc = SimpleDocTemplate(output, pagesize=A4, leftMargin=2*cm, rightMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    story = []
     
     # Title
     story.append(Paragraph('PROTOKÓŁ ZE SPOTKANIA', title_style))
@@ -124,14 +143,15 @@ def generate_protocol_pdf(protocol, filename: str) -> None:
     # Participants
     if protocol.participants:
         story.append(Paragraph('Uczestnicy:', heading_style))
-        for participant in protocol.participants:
-            story.append(Paragraph(f'• {participant.name}', normal_style))
+        # Paragraph cells wrap long names within the column width
+        participants_data = [[Paragraph(f'• {participant.name}', normal_style)] for participant in protocol.participants]
+        story.append(Table(participants_data, colWidths=[doc.width], style=pdf_styles['list']))
         story.append(Spacer(1, 0.5*cm))
     
     # Agenda items
     if protocol.agenda_items:
         story.append(Paragraph('Porządek obrad:', heading_style))
-        for item in sorted(protocol.agenda_items, key=lambda x: x.order):
+        for item in sorted(protocol.agenda_items, key=attrgetter('order')):
             story.append(Paragraph(f'<font name="{bold_font}">{item.title}</font>', normal_style))
             if item.discussion:
                 story.append(Paragraph(item.discussion, normal_style))
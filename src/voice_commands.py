@@ -3,19 +3,51 @@ Voice Commands Module for Protokolant
 System poleceń głosowych do sterowania aplikacją
 """
 
+import os
 import re
-from typing import Optional, Tuple, List, Dict
-from datetime import datetime
+import time
+from collections import deque
+from typing import Optional, Tuple, List, Dict, NamedTuple
+from datetime import datetime, timedelta
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Wyrażenia używane przy każdym wejściu głosowym - kompilowane raz
+_SENT_END_RE = re.compile(r'[.!?]')
+_WORD_RE = re.compile(r'\S+')
+
+class TextEntry(NamedTuple):
+    """Wpis historii tekstu - dodany fragment i jego pozycja w dokumencie"""
+    text: str
+    ts_ns: int
+    start: int
+    end: int
+    type: str = 'addition'
+
+class CommandEntry(NamedTuple):
+    """Wpis historii poleceń (pola nieużywane przez dane polecenie mają wartość None)"""
+    command: str
+    ts_ns: int
+    removed_text: Optional[str] = None
+    filepath: Optional[str] = None
+    old_text_length: Optional[int] = None
+
+# Pola CommandEntry zwracane przez get_history, gdy polecenie je ustawiło
+_COMMAND_DETAIL_KEYS = ('removed_text', 'filepath', 'old_text_length')
+
 class VoiceCommandProcessor:
     """
     Klasa do przetwarzania poleceń głosowych
     Reaguje na słowo "Uwaga" i wykonuje polecenia sterujące
     """
     
+    __slots__ = (
+        'text_history', 'command_history', 'last_command', '_epoch', '_epoch_ns',
+        '_segments', '_text', '_length', '_word_starts', '_sentence_ends'
+    )
+    
     # Słowo aktywujące system poleceń
     TRIGGER_WORD = "uwaga"
     
@@ -28,13 +60,97 @@ class VoiceCommandProcessor:
         'zapisz': 'save_document'         # Zapisuje wprowadzone zmiany
     }
     
+    # Maksymalna liczba wpisów w każdej z historii (najstarsze są usuwane)
+    HISTORY_LIMIT = 10_000
+    
+    # Wartości wyliczane raz przy definicji klasy, nie przy każdym wywołaniu
+    _TRIGGER_LEN = len(TRIGGER_WORD)
+    
+    # Polecenie bezpośrednio po słowie aktywującym - najdłuższe frazy najpierw
+    _COMMAND_RE = re.compile(
+        r'\s*(' + '|'.join(re.escape(phrase) for phrase in sorted(COMMANDS, key=len, reverse=True)) + r')\b'
+    )
+    
     def __init__(self):
         """Inicjalizacja procesora poleceń głosowych"""
-        self.text_history = []           # Historia wszystkich wprowadzonych tekstów
-        self.current_text = ""           # Aktualny tekst dokumentu
-        self.command_history = []        # Historia wykonanych poleceń
-        self.last_command = None         # Ostatnie wykonane polecenie
+        self.text_history = deque(maxlen=self.HISTORY_LIMIT)     # Historia wszystkich wprowadzonych tekstów
+        self.command_history = deque(maxlen=self.HISTORY_LIMIT)  # Historia wykonanych poleceń
+        self.last_command = None                                 # Ostatnie wykonane polecenie
+        
+        # Wpisy historii mają znacznik time.monotonic_ns() - datetime tworzony dopiero w get_history
+        self._epoch = datetime.now()
+        self._epoch_ns = time.monotonic_ns()
+        
+        # Dokument jako lista fragmentów łączonych spacją dopiero przy odczycie
+        self._segments = []              # Fragmenty dokumentu w kolejności dodania
+        self._text = ""                  # Połączony tekst (None = do przeliczenia)
+        self._length = 0                 # Długość połączonego tekstu
+        
+        # Indeks aktualizowany przy każdej zmianie - statystyki i cofanie słowa bez skanowania dokumentu.
+        # Niepusta lista słów oznacza, że dokument ma treść (zastępuje current_text.strip())
+        self._word_starts = []           # Pozycje początków słów w połączonym tekście
+        self._sentence_ends = []         # Pozycje tuż za znakami końca zdania
+    
+    @property
+    def current_text(self) -> str:
+        """Aktualny tekst dokumentu"""
+        if self._text is None:
+            self._text = " ".join(self._segments)
+        return self._text
+    
+    @current_text.setter
+    def current_text(self, text: str):
+        self._text = text
+        self._length = len(text)
+        if not text:
+            # Nowy lub wyczyszczony dokument - nie ma czego skanować
+            self._segments = []
+            self._word_starts = []
+            self._sentence_ends = []
+            return
+        
+        # Pełne skanowanie tylko przy podmianie całego tekstu - dodawanie i cofanie
+        # aktualizują indeksy przyrostowo
+        self._segments = [text]
+        self._word_starts = [match.start() for match in _WORD_RE.finditer(text)]
+        self._sentence_ends = [match.end() for match in _SENT_END_RE.finditer(text)]
+    
+    def _truncate(self, pos: int) -> str:
+        """
+        Obcina dokument do pozycji pos (bez końcowych spacji)
         
+        Zmieniane są tylko fragmenty leżące za pos - koszt zależy od długości
+        usuwanego końca, nie całego dokumentu. Fragmenty nie mają spacji na
+        brzegach, więc białe znaki mogą się pojawić tylko w miejscu cięcia.
+        
+        Returns:
+            Usunięty tekst
+        """
+        removed = []
+        while self._segments and self._length > pos:
+            segment = self._segments.pop()
+            segment_start = self._length - len(segment)
+            if segment_start < pos:
+                # Fragment przecięty przez pos - zostaje jego początek
+                kept = segment[:pos - segment_start]
+                if kept[-1].isspace():
+                    kept = kept.rstrip()
+                tail = segment[pos - segment_start:]
+                removed.append(tail.lstrip() if tail[0].isspace() else tail)
+                self._segments.append(kept)
+                self._length = segment_start + len(kept)
+                break
+            removed.append(segment)
+            self._length = segment_start - 1 if self._segments else 0
+        
+        while self._word_starts and self._word_starts[-1] >= pos:
+            self._word_starts.pop()
+        while self._sentence_ends and self._sentence_ends[-1] > pos:
+            self._sentence_ends.pop()
+        self._text = None
+        removed.reverse()
+        return " ".join(removed)
+    
     def parse_voice_input(self, voice_text: str) -> Tuple[bool, Optional[str], str]:
         """
         Parsuje tekst głosowy i sprawdza czy zawiera polecenie
@@ -48,45 +164,17 @@ class VoiceCommandProcessor:
             - command_name: Nazwa polecenia lub None
             - remaining_text: Tekst bez polecenia
         """
-        # Normalizacja tekstu (małe litery, usuń nadmiarowe spacje)
-        normalized = voice_text.lower().strip()
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Sprawdź czy tekst zawiera słowo "uwaga"
-        if self.TRIGGER_WORD not in normalized:
-            return False, None, voice_text
-        
-        # Znajdź pozycję słowa "uwaga"
-        parts = normalized.split(self.TRIGGER_WORD, 1)
-        
-        if len(parts) < 2:
+        # Sprawdź czy tekst zawiera słowo "uwaga" - zwykłe dyktowanie kończy się tutaj,
+        # bez normalizacji (zwijanie spacji nie może utworzyć ani usunąć tego słowa)
+        lowered = voice_text.lower()
+        if self.TRIGGER_WORD not in lowered:
             return False, None, voice_text
         
-        before_trigger = parts[0].strip()
-        after_trigger = parts[1].strip()
-        
-        # Sprawdź polecenia w kolejności od najdłuższych
-        detected_command = None
-        remaining = after_trigger
-        
-        for command_phrase, command_name in sorted(
-            self.COMMANDS.items(), 
-            key=lambda x: len(x[0]), 
-            reverse=True
-        ):
-            if after_trigger.startswith(command_phrase):
-                detected_command = command_name
-                # Usuń polecenie z tekstu
-                remaining = after_trigger[len(command_phrase):].strip()
-                break
-        
-        if detected_command:
-            logger.info(f"Wykryto polecenie: {detected_command}")
-            return True, detected_command, before_trigger
-        else:
-            # "Uwaga" bez prawidłowego polecenia
-            logger.warning(f"Wykryto 'uwaga' ale brak prawidłowego polecenia: {after_trigger}")
-            return False, None, voice_text
+        # Rozpoznawanie powtarza te same krótkie polecenia - wynik parsowania jest zapamiętywany
+        result = _parse(voice_text)
+        if result[0]:
+            logger.info(f"Wykryto polecenie: {result[1]}")
+        return result
     
     def add_text(self, text: str):
         """
@@ -95,21 +183,20 @@ class VoiceCommandProcessor:
         Args:
             text: Tekst do dodania
         """
-        if not text.strip():
+        text = text.strip()
+        if not text:
             return
         
-        # Zapisz w historii
-        self.text_history.append({
-            'text': text,
-            'timestamp': datetime.now(),
-            'type': 'addition'
-        })
-        
-        # Dodaj do aktualnego tekstu
-        if self.current_text:
-            self.current_text += " " + text
-        else:
-            self.current_text = text
+        # Zapisz w historii wraz z pozycją w dokumencie (dla szybkiego cofania)
+        start = self._length + (1 if self._segments else 0)
+        self.text_history.append(TextEntry(text, time.monotonic_ns(), start, start + len(text)))
+        
+        # Dodaj fragment - bez kopiowania całego dokumentu
+        self._segments.append(text)
+        self._text = None
+        self._length = start + len(text)
+        self._word_starts.extend(start + match.start() for match in _WORD_RE.finditer(text))
+        self._sentence_ends.extend(start + match.end() for match in _SENT_END_RE.finditer(text))
         
         logger.info(f"Dodano tekst: {text}")
     
@@ -123,21 +210,18 @@ class VoiceCommandProcessor:
         if not self.text_history:
             return False, "Brak tekstu do cofnięcia"
         
-        # Znajdź ostatnio dodany tekst
-        last_entry = None
-        for i in range(len(self.text_history) - 1, -1, -1):
-            if self.text_history[i]['type'] == 'addition':
-                last_entry = self.text_history[i]
-                break
-        
-        if not last_entry:
-            return False, "Brak tekstu do cofnięcia"
+        # Historia tekstów zawiera tylko dodania - ostatni wpis to ostatnio dodany tekst
+        # (kolejne "cofnij" sięga coraz dalej wstecz)
+        last_entry = self.text_history.pop()
         
         # Usuń ostatni tekst
-        text_to_remove = last_entry['text']
+        text_to_remove = last_entry.text
         
         # Usuń z aktualnego tekstu
-        if self.current_text.endswith(text_to_remove):
+        if last_entry.end == self._length and self._segments[-1] == text_to_remove:
+            # Dokument nie zmienił się od dodania - cofany tekst to ostatni fragment
+            self._truncate(last_entry.start)
+        elif self.current_text.endswith(text_to_remove):
             self.current_text = self.current_text[:-len(text_to_remove)].rstrip()
         else:
             # Usuń ostatnie wystąpienie
@@ -147,11 +231,7 @@ class VoiceCommandProcessor:
                 self.current_text = self.current_text.strip()
         
         # Zapisz w historii poleceń
-        self.command_history.append({
-            'command': 'undo_text',
-            'timestamp': datetime.now(),
-            'removed_text': text_to_remove
-        })
+        self.command_history.append(CommandEntry('undo_text', time.monotonic_ns(), removed_text=text_to_remove))
         
         logger.info(f"Cofnięto tekst: {text_to_remove}")
         return True, f"Cofnięto: '{text_to_remove}'"
@@ -163,28 +243,14 @@ class VoiceCommandProcessor:
         Returns:
             Tuple (success, message)
         """
-        if not self.current_text.strip():
+        if not self._word_starts:
             return False, "Brak tekstu do cofnięcia"
         
-        # Podziel na słowa
-        words = self.current_text.split()
-        
-        if not words:
-            return False, "Brak słów do cofnięcia"
-        
-        # Usuń ostatnie słowo
-        removed_word = words[-1]
-        words = words[:-1]
-        
-        # Zaktualizuj tekst
-        self.current_text = " ".join(words)
+        # Usuń ostatnie słowo - zmieniany jest tylko ostatni fragment
+        removed_word = self._truncate(self._word_starts[-1])
         
         # Zapisz w historii
-        self.command_history.append({
-            'command': 'undo_word',
-            'timestamp': datetime.now(),
-            'removed_text': removed_word
-        })
+        self.command_history.append(CommandEntry('undo_word', time.monotonic_ns(), removed_text=removed_word))
         
         logger.info(f"Cofnięto słowo: {removed_word}")
         return True, f"Cofnięto słowo: '{removed_word}'"
@@ -196,44 +262,29 @@ class VoiceCommandProcessor:
         Returns:
             Tuple (success, message)
         """
-        if not self.current_text.strip():
+        if not self._word_starts:
             return False, "Brak tekstu do cofnięcia"
         
-        # Znajdź ostatnie zdanie (kończy się kropką, wykrzyknikiem lub znakiem zapytania)
-        sentence_endings = r'[.!?]'
+        # Zakończenia zdań (kropka, wykrzyknik lub znak zapytania) są indeksowane przy dodawaniu
+        sentence_ends = self._sentence_ends
         
-        # Znajdź wszystkie zakończenia zdań
-        matches = list(re.finditer(sentence_endings, self.current_text))
-        
-        if not matches:
+        if not sentence_ends:
             # Brak zakończenia zdania - usuń cały tekst jako niekompletne zdanie
-            removed_sentence = self.current_text
-            self.current_text = ""
+            cut = 0
+        elif sentence_ends[-1] < self._length:
+            # Jest tekst po ostatnim zakończeniu - usuń go
+            cut = sentence_ends[-1]
+        elif len(sentence_ends) > 1:
+            # Usuń ostatnie kompletne zdanie
+            cut = sentence_ends[-2]
         else:
-            # Usuń tekst po ostatnim zakończeniu zdania
-            last_ending = matches[-1].end()
-            
-            if last_ending < len(self.current_text):
-                # Jest tekst po ostatnim zakończeniu - usuń go
-                removed_sentence = self.current_text[last_ending:].strip()
-                self.current_text = self.current_text[:last_ending].strip()
-            else:
-                # Usuń ostatnie kompletne zdanie
-                if len(matches) > 1:
-                    prev_ending = matches[-2].end()
-                    removed_sentence = self.current_text[prev_ending:].strip()
-                    self.current_text = self.current_text[:prev_ending].strip()
-                else:
-                    # To pierwsze zdanie - usuń wszystko
-                    removed_sentence = self.current_text
-                    self.current_text = ""
+            # To pierwsze zdanie - usuń wszystko
+            cut = 0
+        
+        removed_sentence = self._truncate(cut)
         
         # Zapisz w historii
-        self.command_history.append({
-            'command': 'undo_sentence',
-            'timestamp': datetime.now(),
-            'removed_text': removed_sentence
-        })
+        self.command_history.append(CommandEntry('undo_sentence', time.monotonic_ns(), removed_text=removed_sentence))
         
         logger.info(f"Cofnięto zdanie: {removed_sentence}")
         return True, f"Cofnięto zdanie: '{removed_sentence}'"
@@ -248,29 +299,32 @@ class VoiceCommandProcessor:
         Returns:
             Tuple (success, message)
         """
-        if not self.current_text.strip():
+        if not self._word_starts:
             return False, "Brak tekstu do zapisania"
         
         try:
+            now = datetime.now()
+            
             # Wygeneruj nazwę pliku jeśli nie podano
             if not filepath:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                timestamp = now.strftime('%Y%m%d_%H%M%S')
                 filepath = f"transcriptions/document_{timestamp}.txt"
             
             # Zapisz do pliku
-            import os
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            directory = os.path.dirname(filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"# Dokument utworzony: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n")
-                f.write(self.current_text)
+            payload = f"# Dokument utworzony: {now.strftime('%d.%m.%Y %H:%M')}\n\n{self.current_text}"
+            
+            # Zapis do pliku tymczasowego i podmiana - plik docelowy nigdy nie jest zapisany częściowo
+            tmp_path = filepath + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, filepath)
             
             # Zapisz w historii
-            self.command_history.append({
-                'command': 'save_document',
-                'timestamp': datetime.now(),
-                'filepath': filepath
-            })
+            self.command_history.append(CommandEntry('save_document', time.monotonic_ns(), filepath=filepath))
             
             logger.info(f"Zapisano dokument: {filepath}")
             return True, f"Zapisano do: {filepath}"
@@ -292,7 +346,7 @@ class VoiceCommandProcessor:
         messages = []
         
         # Zapisz obecny dokument jeśli ma treść
-        if save_current and self.current_text.strip():
+        if save_current and self._word_starts:
             success, message = self.save_document()
             if success:
                 messages.append(message)
@@ -302,14 +356,10 @@ class VoiceCommandProcessor:
         # Wyczyść obecny dokument
         old_text = self.current_text
         self.current_text = ""
-        self.text_history = []
+        self.text_history.clear()
         
         # Zapisz w historii
-        self.command_history.append({
-            'command': 'new_document',
-            'timestamp': datetime.now(),
-            'old_text_length': len(old_text)
-        })
+        self.command_history.append(CommandEntry('new_document', time.monotonic_ns(), old_text_length=len(old_text)))
         
         logger.info("Utworzono nowy dokument")
         messages.append("Utworzono nowy, czysty dokument")
@@ -327,24 +377,28 @@ class VoiceCommandProcessor:
         Returns:
             Tuple (success, message)
         """
-        command_map = {
-            'undo_text': lambda: self.undo_text(),
-            'undo_word': lambda: self.undo_word(),
-            'undo_sentence': lambda: self.undo_sentence(),
-            'save_document': lambda: self.save_document(kwargs.get('filepath')),
-            'new_document': lambda: self.new_document(kwargs.get('save_current', True))
-        }
+        dispatch = self._COMMAND_DISPATCH.get(command_name)
         
-        if command_name not in command_map:
+        if dispatch is None:
             return False, f"Nieznane polecenie: {command_name}"
         
+        method, params = dispatch
         try:
             self.last_command = command_name
-            return command_map[command_name]()
+            return method(self, *(kwargs.get(name, default) for name, default in params))
         except Exception as e:
             logger.error(f"Błąd wykonania polecenia {command_name}: {e}")
             return False, f"Błąd wykonania: {str(e)}"
     
+    # Polecenie -> (metoda, parametry pobierane z kwargs wraz z wartościami domyślnymi)
+    _COMMAND_DISPATCH = {
+        'undo_text': (undo_text, ()),
+        'undo_word': (undo_word, ()),
+        'undo_sentence': (undo_sentence, ()),
+        'save_document': (save_document, (('filepath', None),)),
+        'new_document': (new_document, (('save_current', True),))
+    }
+    
     def process_voice_input(self, voice_text: str, **kwargs) -> Dict:
         """
         GŁÓWNA FUNKCJA: Przetwarza wejście głosowe i wykonuje polecenia
@@ -369,7 +423,7 @@ class VoiceCommandProcessor:
             'command_executed': None,
             'command_result': None,
             'text_added': False,
-            'current_text': self.current_text,
+            'current_text': '',
             'message': ''
         }
         
@@ -383,21 +437,20 @@ class VoiceCommandProcessor:
             
             success, message = self.execute_command(command_name, **kwargs)
             result['command_result'] = (success, message)
-            result['current_text'] = self.current_text
             result['message'] = message
             
             # Dodaj pozostały tekst jeśli jest
             if remaining_text.strip():
                 self.add_text(remaining_text)
                 result['text_added'] = True
-                result['current_text'] = self.current_text
         else:
             # Zwykły tekst - dodaj do dokumentu
             self.add_text(voice_text)
             result['text_added'] = True
-            result['current_text'] = self.current_text
             result['message'] = 'Dodano tekst'
         
+        # Tekst dokumentu składany raz, po wszystkich zmianach
+        result['current_text'] = self.current_text
         return result
     
     def get_text(self) -> str:
@@ -405,32 +458,73 @@ class VoiceCommandProcessor:
         return self.current_text
     
     def get_history(self) -> List[Dict]:
-        """Zwraca historię wszystkich operacji"""
-        return self.text_history + self.command_history
+        """Zwraca historię wszystkich operacji (wpisy z kluczem 'timestamp')"""
+        epoch, epoch_ns = self._epoch, self._epoch_ns
+        
+        def timestamp(entry):
+            return epoch + timedelta(microseconds=(entry.ts_ns - epoch_ns) // 1000)
+        
+        # Te same klucze co dawne słowniki historii - bez wewnętrznych ts_ns/start/end
+        history = [
+            {'text': entry.text, 'timestamp': timestamp(entry), 'type': entry.type}
+            for entry in self.text_history
+        ]
+        for entry in self.command_history:
+            item = {'command': entry.command, 'timestamp': timestamp(entry)}
+            for key in _COMMAND_DETAIL_KEYS:
+                value = getattr(entry, key)
+                if value is not None:
+                    item[key] = value
+            history.append(item)
+        return history
     
     def get_statistics(self) -> Dict:
         """Zwraca statystyki dokumentu"""
-        words = len(self.current_text.split()) if self.current_text else 0
-        sentences = len(re.findall(r'[.!?]', self.current_text))
-        characters = len(self.current_text)
-        
         return {
-            'words': words,
-            'sentences': sentences,
-            'characters': characters,
-            'text_additions': len([h for h in self.text_history if h['type'] == 'addition']),
+            'words': len(self._word_starts),
+            'sentences': len(self._sentence_ends),
+            'characters': self._length,
+            'text_additions': len(self.text_history),
             'commands_executed': len(self.command_history)
         }
     
     def reset(self):
         """Resetuje procesor do stanu początkowego"""
-        self.text_history = []
+        self.text_history.clear()
         self.current_text = ""
-        self.command_history = []
+        self.command_history.clear()
         self.last_command = None
         logger.info("Procesor poleceń zresetowany")
 
 
+@lru_cache(maxsize=256)
+def _parse(voice_text: str) -> Tuple[bool, Optional[str], str]:
+    """
+    Parsuje wypowiedź zawierającą słowo aktywujące
+    
+    Zależy wyłącznie od tekstu i stałych klasy, więc wynik może być cache'owany.
+    Ostrzeżenie o nieznanym poleceniu jest logowane raz dla danej wypowiedzi.
+    """
+    # Normalizacja tekstu (małe litery, usuń nadmiarowe spacje) - split/join w jednym przejściu
+    normalized = ' '.join(voice_text.lower().split())
+    
+    # Znajdź pozycję słowa "uwaga"
+    trigger_pos = normalized.find(VoiceCommandProcessor.TRIGGER_WORD)
+    before_trigger = normalized[:trigger_pos].strip()
+    
+    # Dopasuj polecenie tuż za słowem aktywującym (jedno przejście wyrażenia)
+    command_pos = trigger_pos + VoiceCommandProcessor._TRIGGER_LEN
+    match = VoiceCommandProcessor._COMMAND_RE.match(normalized, command_pos)
+    
+    if match:
+        return True, VoiceCommandProcessor.COMMANDS[match.group(1)], before_trigger
+    else:
+        # "Uwaga" bez prawidłowego polecenia
+        after_trigger = normalized[command_pos:].strip()
+        logger.warning(f"Wykryto 'uwaga' ale brak prawidłowego polecenia: {after_trigger}")
+        return False, None, voice_text
+
+
 # Funkcja pomocnicza do szybkiego użycia
 def process_voice_command(voice_text: str, processor: Optional[VoiceCommandProcessor] = None) -> Dict:
     """
@@ -5,13 +5,131 @@ Zarządzanie konfiguracją poleceń głosowych z poziomu aplikacji
 
 import json
 import os
-import copy
+import sys
+import hashlib
+import threading
+import inspect
+from dataclasses import dataclass, field
+from functools import wraps
 from typing import Dict, List, Tuple, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
+# Opcjonalny szybszy parser/serializer JSON (C) - w razie braku moduł json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# fdatasync (Linux) utrwala dane bez zbędnego zapisu metadanych jak czas dostępu - gdzie brak, fsync
+_fsync = getattr(os, 'fdatasync', os.fsync)
+
+
+def _dumps(obj, compact: bool = False) -> bytes:
+    """
+    Serializuje konfigurację do JSON w UTF-8
+    
+    Pliki są wcięte, bo użytkownik może je edytować; compact=True dla danych
+    trzymanych tylko w pamięci (mniej bajtów do parsowania).
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj) if compact else orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(obj, indent=4, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Parsuje JSON z bajtów UTF-8"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _norm(value):
+    """
+    Normalizuje frazę (bez spacji na brzegach, małe litery)
+    
+    Tekst już znormalizowany jest zwracany bez tworzenia nowych napisów;
+    wartości niebędące tekstem (np. None) przechodzą bez zmian.
+    """
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    return value if value.islower() else value.lower()
+
+
+def _normalize_args(*names):
+    """
+    Dekorator normalizujący (_norm) wskazane argumenty metody - jedno miejsce zamiast
+    strip().lower() powtarzanego w każdej metodzie
+    """
+    def decorator(method):
+        params = list(inspect.signature(method).parameters)
+        positions = tuple((name, params.index(name)) for name in names)
+        
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            for name, position in positions:
+                if name in kwargs:
+                    kwargs[name] = _norm(kwargs[name])
+                elif position < len(args):
+                    args = (*args[:position], _norm(args[position]), *args[position + 1:])
+            return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@dataclass(slots=True)
+class Command:
+    """Polecenie głosowe w pamięci - w pliku i w API reprezentowane jako słownik"""
+    action: str
+    description: str = ''
+    enabled: bool = True
+    aliases: List[str] = field(default_factory=list)
+    
+    # Oczekiwane typy pól w pliku - sprawdzane przy imporcie w tym samym przejściu co konwersja
+    _SCHEMA = (('action', str), ('description', str), ('enabled', bool), ('aliases', list))
+    
+    @classmethod
+    def from_dict(cls, data: Dict, strict: bool = False) -> 'Command':
+        """
+        Tworzy polecenie ze słownika konfiguracji (akcja i aliasy internowane)
+        
+        Args:
+            data: Słownik polecenia
+            strict: Czy sprawdzać typy pól (ValueError przy nieprawidłowych)
+        """
+        if strict:
+            if not isinstance(data, dict) or 'action' not in data:
+                raise ValueError("polecenie musi być obiektem z polem action")
+            for key, expected in cls._SCHEMA:
+                if key in data and not isinstance(data[key], expected):
+                    raise ValueError(f"pole '{key}' ma nieprawidłowy typ")
+            if not all(isinstance(alias, str) for alias in data.get('aliases', ())):
+                raise ValueError("aliasy muszą być tekstami")
+        
+        action = data.get('action', '')
+        return cls(
+            sys.intern(action) if isinstance(action, str) else action,
+            data.get('description', ''),
+            data.get('enabled', True),
+            [sys.intern(alias) if isinstance(alias, str) else alias for alias in data.get('aliases', [])]
+        )
+    
+    def to_dict(self) -> Dict:
+        """Zwraca polecenie jako słownik zgodny z JSON"""
+        return {
+            'action': self.action,
+            'description': self.description,
+            'enabled': self.enabled,
+            'aliases': list(self.aliases)
+        }
+
+
 class VoiceCommandsConfig:
     """
     Klasa do zarządzania konfiguracją poleceń głosowych
@@ -61,6 +179,14 @@ class VoiceCommandsConfig:
         }
     }
     
+    # Domyślna konfiguracja zserializowana raz - każda kopia to jedno parsowanie w C
+    _DEFAULT_BLOB = _dumps(DEFAULT_CONFIG, compact=True)
+    
+    @classmethod
+    def _default_config(cls) -> Dict:
+        """Zwraca nową, niezależną kopię konfiguracji domyślnej"""
+        return _loads(cls._DEFAULT_BLOB)
+    
     def __init__(self, config_path: Optional[str] = None):
         """
         Inicjalizacja managera konfiguracji
@@ -70,6 +196,14 @@ class VoiceCommandsConfig:
         """
         self.config_path = config_path or self.DEFAULT_CONFIG_PATH
         self.config = None
+        self._dirty = False  # Zmiany w pamięci jeszcze niezapisane do pliku
+        self._file_stamp = None  # (mtime_ns, rozmiar) pliku przy ostatnim odczycie/zapisie
+        self._etag = None  # Skrót zawartości pliku, liczony ponownie tylko po zmianie
+        self._file_data = None  # Bajty pliku z ostatniego odczytu/zapisu (do ETag bez ponownego odczytu)
+        self._persisted = None  # Migawka konfiguracji odpowiadająca zawartości pliku
+        self._alias_index = {}  # Alias -> frazy poleceń, które go używają (w kolejności dodania)
+        self._alias_count = 0  # Liczniki dla statystyk, aktualizowane przy każdej zmianie
+        self._enabled_count = 0
         self.load_config()
     
     def load_config(self) -> bool:
@@ -80,23 +214,123 @@ class VoiceCommandsConfig:
             True jeśli udało się załadować
         """
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                logger.info(f"Załadowano konfigurację z: {self.config_path}")
-                return True
-            else:
+            try:
+                with open(self.config_path, 'rb') as f:
+                    data = f.read()
+                    stamp = self._stamp(os.fstat(f.fileno()))
+            except FileNotFoundError:
                 # Utwórz domyślną konfigurację
                 logger.info("Tworzenie domyślnej konfiguracji")
-                self.config = copy.deepcopy(self.DEFAULT_CONFIG)
-                self.config['metadata']['created'] = datetime.now().isoformat()
+                config = self._default_config()
+                config['metadata']['created'] = datetime.now().isoformat()
+                self._set_config(config)
                 self.save_config()
                 return True
+            
+            self._set_config(_loads(data))
+            self._persisted = self._snapshot()
+            self._file_stamp = stamp
+            self._file_data = data
+            self._etag = None
+            logger.info(f"Załadowano konfigurację z: {self.config_path}")
+            return True
         except Exception as e:
             logger.error(f"Błąd ładowania konfiguracji: {e}")
-            self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+            self._set_config(self._default_config())
+            self._persisted = None
+            self._file_data = None
             return False
     
+    def _set_config(self, config: Dict, strict: bool = False):
+        """
+        Podmienia całą konfigurację i odbudowuje indeks aliasów
+        
+        Polecenia ze słownika są zamieniane na obiekty Command. Akcje i aliasy
+        powtarzają się między poleceniami i konfiguracjami - są internowane,
+        więc porównania w słownikach przechodzą przez tożsamość. Przy błędzie
+        walidacji (strict) obecna konfiguracja pozostaje bez zmian.
+        """
+        if strict:
+            if not isinstance(config.get('trigger_word'), str) or not config['trigger_word'].strip():
+                raise ValueError("trigger_word musi być niepustym tekstem")
+            if not isinstance(config['commands'], dict):
+                raise ValueError("commands musi być obiektem")
+            if not isinstance(config.get('metadata', {}), dict):
+                raise ValueError("metadata musi być obiektem")
+        
+        # Starsze pliki mogą nie mieć sekcji metadata - uzupełniamy ją, żeby
+        # migawka i zapis nie kończyły się błędem (i nadpisaniem pliku domyślnymi)
+        if not isinstance(config.get('metadata'), dict):
+            config['metadata'] = {}
+        
+        previous = self._alias_index, self._alias_count
+        self._alias_index, self._alias_count = {}, 0
+        commands = {}
+        try:
+            for command_phrase, data in config['commands'].items():
+                try:
+                    command = commands[command_phrase] = Command.from_dict(data, strict)
+                except ValueError as e:
+                    raise ValueError(f"polecenie '{command_phrase}': {e}") from None
+                self._index_command(command_phrase, command)
+        except Exception:
+            self._alias_index, self._alias_count = previous
+            raise
+        config['commands'] = commands
+        self._enabled_count = sum(1 for command in commands.values() if command.enabled)
+        if isinstance(config.get('trigger_word'), str):
+            config['trigger_word'] = sys.intern(config['trigger_word'])
+        self.config = config
+    
+    def _index_alias(self, command_phrase: str, alias: str):
+        """Dodaje alias polecenia do indeksu"""
+        self._alias_index.setdefault(alias, []).append(command_phrase)
+        self._alias_count += 1
+    
+    def _unindex_alias(self, command_phrase: str, alias: str):
+        """Usuwa alias polecenia z indeksu"""
+        phrases = self._alias_index[alias]
+        phrases.remove(command_phrase)
+        if not phrases:
+            del self._alias_index[alias]
+        self._alias_count -= 1
+    
+    def _has_alias(self, command_phrase: str, alias: str) -> bool:
+        """Sprawdza przez indeks czy polecenie ma alias - bez przeszukiwania listy aliasów"""
+        return command_phrase in self._alias_index.get(alias, ())
+    
+    def _index_command(self, command_phrase: str, command: Command):
+        """Dodaje aliasy polecenia do indeksu"""
+        for alias in command.aliases:
+            self._index_alias(command_phrase, alias)
+    
+    def _unindex_command(self, command_phrase: str, command: Command):
+        """Usuwa z indeksu aliasy polecenia"""
+        for alias in command.aliases:
+            self._unindex_alias(command_phrase, alias)
+    
+    def _snapshot(self) -> Dict:
+        """
+        Konfiguracja w postaci gotowej do serializacji (polecenia jako słowniki)
+        
+        Słowniki poleceń budowane bezpośrednio w jednym wyrażeniu - bez wywołań
+        to_dict() dla każdego polecenia. Listy aliasów są kopiowane, bo migawka
+        jest przechowywana do porównań.
+        """
+        return {
+            **self.config,
+            'commands': {
+                command_phrase: {
+                    'action': command.action,
+                    'description': command.description,
+                    'enabled': command.enabled,
+                    'aliases': command.aliases[:]
+                }
+                for command_phrase, command in self.config['commands'].items()
+            },
+            'metadata': dict(self.config['metadata'])
+        }
+    
     def save_config(self) -> Tuple[bool, str]:
         """
         Zapisuje konfigurację do pliku
@@ -105,15 +339,36 @@ class VoiceCommandsConfig:
             Tuple (success, message)
         """
         try:
+            # Porównanie z migawką ostatnio odczytanej/zapisanej treści (np. ustawienie
+            # tej samej wartości) - bez zapisu, bez zmiany last_modified i bez serializacji
+            snapshot = self._snapshot()
+            if snapshot == self._persisted:
+                self._dirty = False
+                return True, "Konfiguracja bez zmian"
+            
             # Zaktualizuj metadata
-            self.config['metadata']['last_modified'] = datetime.now().isoformat()
+            last_modified = datetime.now().isoformat()
+            self.config['metadata']['last_modified'] = last_modified
+            snapshot['metadata']['last_modified'] = last_modified
             
             # Utwórz katalog jeśli nie istnieje
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+            self._ensure_dir(self.config_path)
             
-            # Zapisz do pliku
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            # Zapisz do pliku tymczasowego i podmień atomowo - przerwany zapis
+            # nie zostawi uszkodzonego pliku konfiguracji
+            tmp_path = self.config_path + '.tmp'
+            data = _dumps(snapshot)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                _fsync(f.fileno())
+                stamp = self._stamp(os.fstat(f.fileno()))
+            os.replace(tmp_path, self.config_path)
+            self._file_stamp = stamp
+            self._file_data = data
+            self._persisted = snapshot
+            self._etag = None
+            self._dirty = False
             
             logger.info(f"Zapisano konfigurację do: {self.config_path}")
             return True, f"Zapisano do: {self.config_path}"
@@ -121,10 +376,95 @@ class VoiceCommandsConfig:
             logger.error(f"Błąd zapisu konfiguracji: {e}")
             return False, f"Błąd zapisu: {str(e)}"
     
+    def _commit(self) -> Tuple[bool, str]:
+        """
+        Zapisuje zmianę wprowadzoną przez metodę modyfikującą
+        
+        Gdy zapis się nie powiedzie, konfiguracja w pamięci wraca do zawartości
+        pliku - współdzielona instancja nie udostępnia zmian, których nie ma na dysku.
+        
+        Returns:
+            Tuple (success, message)
+        """
+        success, message = self.save_config()
+        if not success:
+            if self._file_data is not None:
+                self._set_config(_loads(self._file_data))
+                self._persisted = self._snapshot()
+            else:
+                # Brak pliku do przywrócenia - zmiana czeka na kolejny zapis
+                self._dirty = True
+        return success, message
+    
+    @staticmethod
+    def _ensure_dir(path: str):
+        """Tworzy katalog pliku, jeśli nie istnieje"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    @staticmethod
+    def _stamp(st: os.stat_result) -> Tuple[int, int]:
+        """
+        Znacznik wersji pliku - mtime w nanosekundach i rozmiar
+        
+        Rozmiar wykrywa zmiany zapisane w obrębie jednego tyknięcia zegara
+        systemu plików (np. 2 s na FAT), których samo mtime nie rozróżnia.
+        """
+        return st.st_mtime_ns, st.st_size
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Przeładowuje konfigurację jeśli plik zmienił się od ostatniego odczytu
+        
+        Returns:
+            True jeśli konfiguracja została przeładowana
+        """
+        try:
+            stamp = self._stamp(os.stat(self.config_path))
+        except OSError:
+            return False
+        
+        # Niezapisane zmiany mają pierwszeństwo przed zawartością pliku
+        if stamp == self._file_stamp or self._dirty:
+            return False
+        return self.load_config()
+    
+    def get_last_modified(self) -> Optional[datetime]:
+        """
+        Zwraca czas modyfikacji pliku przy ostatnim odczycie/zapisie
+        
+        Returns:
+            Czas modyfikacji lub None jeśli plik nie został odczytany
+        """
+        if self._file_stamp is None:
+            return None
+        return datetime.fromtimestamp(self._file_stamp[0] / 1e9, timezone.utc)
+    
+    def get_etag(self) -> Optional[str]:
+        """
+        Zwraca ETag konfiguracji (skrót MD5 zawartości pliku)
+        
+        Returns:
+            ETag lub None jeśli pliku nie da się odczytać
+        """
+        if self._etag is None:
+            # Zwykle bajty są już w pamięci po odczycie lub zapisie pliku
+            data = self._file_data
+            if data is None:
+                try:
+                    with open(self.config_path, 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    return None
+            self._etag = hashlib.md5(data).hexdigest()
+        return self._etag
+    
     def get_trigger_word(self) -> str:
         """Zwraca aktualne słowo aktywujące"""
         return self.config.get('trigger_word', 'uwaga')
     
+    @_normalize_args('new_trigger')
     def set_trigger_word(self, new_trigger: str) -> Tuple[bool, str]:
         """
         Ustawia nowe słowo aktywujące
@@ -135,20 +475,23 @@ class VoiceCommandsConfig:
         Returns:
             Tuple (success, message)
         """
-        if not new_trigger or not new_trigger.strip():
+        if not new_trigger:
             return False, "Słowo aktywujące nie może być puste"
         
         old_trigger = self.config['trigger_word']
-        self.config['trigger_word'] = new_trigger.strip().lower()
+        self.config['trigger_word'] = new_trigger
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, f"Zmieniono '{old_trigger}' na '{new_trigger}'"
         return False, message
     
     def get_all_commands(self) -> Dict:
-        """Zwraca wszystkie polecenia"""
-        return self.config.get('commands', {})
+        """Zwraca wszystkie polecenia (jako słowniki)"""
+        return {
+            command_phrase: command.to_dict()
+            for command_phrase, command in self.config['commands'].items()
+        }
     
     def get_command(self, command_phrase: str) -> Optional[Dict]:
         """
@@ -160,8 +503,10 @@ class VoiceCommandsConfig:
         Returns:
             Dict z danymi polecenia lub None
         """
-        return self.config['commands'].get(command_phrase)
+        command = self.config['commands'].get(command_phrase)
+        return command.to_dict() if command is not None else None
     
+    @_normalize_args('command_phrase')
     def add_command(
         self, 
         command_phrase: str, 
@@ -183,29 +528,32 @@ class VoiceCommandsConfig:
         Returns:
             Tuple (success, message)
         """
-        if not command_phrase or not command_phrase.strip():
+        if not command_phrase:
             return False, "Fraza polecenia nie może być pusta"
         
-        if not action or not action.strip():
+        action = action.strip() if action else ''
+        if not action:
             return False, "Akcja nie może być pusta"
         
-        command_phrase = command_phrase.strip().lower()
-        
         if command_phrase in self.config['commands']:
             return False, f"Polecenie '{command_phrase}' już istnieje"
         
-        self.config['commands'][command_phrase] = {
-            'action': action.strip(),
-            'description': description.strip(),
-            'enabled': enabled,
-            'aliases': aliases or []
-        }
-        
-        success, message = self.save_config()
+        command = Command(
+            sys.intern(action),
+            description.strip(),
+            enabled,
+            list(aliases) if aliases else []
+        )
+        self.config['commands'][command_phrase] = command
+        self._index_command(command_phrase, command)
+        self._enabled_count += bool(command.enabled)
+        
+        success, message = self._commit()
         if success:
             return True, f"Dodano polecenie '{command_phrase}'"
         return False, message
     
+    @_normalize_args('new_phrase')
     def update_command(
         self,
         command_phrase: str,
@@ -236,24 +584,28 @@ class VoiceCommandsConfig:
         
         # Aktualizuj pola
         if action is not None:
-            command['action'] = action.strip()
+            command.action = sys.intern(action.strip())
         if description is not None:
-            command['description'] = description.strip()
+            command.description = description.strip()
         if aliases is not None:
-            command['aliases'] = aliases
+            self._unindex_command(command_phrase, command)
+            command.aliases = list(aliases)
+            self._index_command(command_phrase, command)
         if enabled is not None:
-            command['enabled'] = enabled
+            self._enabled_count += bool(enabled) - bool(command.enabled)
+            command.enabled = enabled
         
         # Zmień frazę jeśli podano nową
-        if new_phrase and new_phrase.strip() != command_phrase:
-            new_phrase = new_phrase.strip().lower()
+        if new_phrase and new_phrase != command_phrase:
             if new_phrase in self.config['commands']:
                 return False, f"Polecenie '{new_phrase}' już istnieje"
+            self._unindex_command(command_phrase, command)
             self.config['commands'][new_phrase] = command
             del self.config['commands'][command_phrase]
+            self._index_command(new_phrase, command)
             command_phrase = new_phrase
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, f"Zaktualizowano polecenie '{command_phrase}'"
         return False, message
@@ -271,9 +623,11 @@ class VoiceCommandsConfig:
         if command_phrase not in self.config['commands']:
             return False, f"Polecenie '{command_phrase}' nie istnieje"
         
-        del self.config['commands'][command_phrase]
+        command = self.config['commands'].pop(command_phrase)
+        self._unindex_command(command_phrase, command)
+        self._enabled_count -= bool(command.enabled)
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, f"Usunięto polecenie '{command_phrase}'"
         return False, message
@@ -292,14 +646,16 @@ class VoiceCommandsConfig:
             return False, f"Polecenie '{command_phrase}' nie istnieje"
         
         command = self.config['commands'][command_phrase]
-        command['enabled'] = not command['enabled']
+        command.enabled = not command.enabled
+        self._enabled_count += 1 if command.enabled else -1
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
-            status = "włączono" if command['enabled'] else "wyłączono"
+            status = "włączono" if command.enabled else "wyłączono"
             return True, f"Polecenie '{command_phrase}' {status}"
         return False, message
     
+    @_normalize_args('alias')
     def add_alias(self, command_phrase: str, alias: str) -> Tuple[bool, str]:
         """
         Dodaje alias do polecenia
@@ -314,17 +670,17 @@ class VoiceCommandsConfig:
         if command_phrase not in self.config['commands']:
             return False, f"Polecenie '{command_phrase}' nie istnieje"
         
-        alias = alias.strip().lower()
         if not alias:
             return False, "Alias nie może być pusty"
         
-        command = self.config['commands'][command_phrase]
-        if alias in command['aliases']:
+        if self._has_alias(command_phrase, alias):
             return False, f"Alias '{alias}' już istnieje"
         
-        command['aliases'].append(alias)
+        alias = sys.intern(alias)
+        self.config['commands'][command_phrase].aliases.append(alias)
+        self._index_alias(command_phrase, alias)
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, f"Dodano alias '{alias}' do '{command_phrase}'"
         return False, message
@@ -343,13 +699,13 @@ class VoiceCommandsConfig:
         if command_phrase not in self.config['commands']:
             return False, f"Polecenie '{command_phrase}' nie istnieje"
         
-        command = self.config['commands'][command_phrase]
-        if alias not in command['aliases']:
+        if not self._has_alias(command_phrase, alias):
             return False, f"Alias '{alias}' nie istnieje"
         
-        command['aliases'].remove(alias)
+        self.config['commands'][command_phrase].aliases.remove(alias)
+        self._unindex_alias(command_phrase, alias)
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, f"Usunięto alias '{alias}' z '{command_phrase}'"
         return False, message
@@ -361,10 +717,11 @@ class VoiceCommandsConfig:
         Returns:
             Tuple (success, message)
         """
-        self.config = copy.deepcopy(self.DEFAULT_CONFIG)
-        self.config['metadata']['created'] = datetime.now().isoformat()
+        config = self._default_config()
+        config['metadata']['created'] = datetime.now().isoformat()
+        self._set_config(config)
         
-        success, message = self.save_config()
+        success, message = self._commit()
         if success:
             return True, "Zresetowano konfigurację do wartości domyślnych"
         return False, message
@@ -380,10 +737,10 @@ class VoiceCommandsConfig:
             Tuple (success, message)
         """
         try:
-            os.makedirs(os.path.dirname(export_path), exist_ok=True)
+            self._ensure_dir(export_path)
             
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            with open(export_path, 'wb') as f:
+                f.write(_dumps(self._snapshot()))
             
             logger.info(f"Wyeksportowano konfigurację do: {export_path}")
             return True, f"Wyeksportowano do: {export_path}"
@@ -402,13 +759,15 @@ class VoiceCommandsConfig:
             Tuple (success, message)
         """
         try:
-            if not os.path.exists(import_path):
+            try:
+                with open(import_path, 'rb') as f:
+                    imported_config = _loads(f.read())
+            except FileNotFoundError:
                 return False, f"Plik nie istnieje: {import_path}"
             
-            with open(import_path, 'r', encoding='utf-8') as f:
-                imported_config = json.load(f)
-            
             # Walidacja podstawowych pól
+            if not isinstance(imported_config, dict):
+                return False, "Nieprawidłowy format konfiguracji: oczekiwano obiektu"
             if 'trigger_word' not in imported_config:
                 return False, "Nieprawidłowy format konfiguracji: brak trigger_word"
             if 'commands' not in imported_config:
@@ -418,11 +777,14 @@ class VoiceCommandsConfig:
             backup_path = self.config_path + '.backup'
             self.export_config(backup_path)
             
-            # Załaduj nową konfigurację
-            self.config = imported_config
+            # Załaduj nową konfigurację - typy pól sprawdzane w trakcie konwersji poleceń
+            try:
+                self._set_config(imported_config, strict=True)
+            except ValueError as e:
+                return False, f"Nieprawidłowy format konfiguracji: {e}"
             self.config['metadata']['last_modified'] = datetime.now().isoformat()
             
-            success, message = self.save_config()
+            success, message = self._commit()
             if success:
                 return True, f"Zaimportowano konfigurację z: {import_path}"
             return False, message
@@ -437,33 +799,48 @@ class VoiceCommandsConfig:
         Returns:
             Dict ze statystykami
         """
-        commands = self.config['commands']
-        enabled_count = sum(1 for cmd in commands.values() if cmd['enabled'])
-        total_aliases = sum(len(cmd['aliases']) for cmd in commands.values())
+        # Liczniki prowadzone przez metody modyfikujące - bez przeglądania poleceń
+        total_commands = len(self.config['commands'])
         
         return {
-            'total_commands': len(commands),
-            'enabled_commands': enabled_count,
-            'disabled_commands': len(commands) - enabled_count,
-            'total_aliases': total_aliases,
+            'total_commands': total_commands,
+            'enabled_commands': self._enabled_count,
+            'disabled_commands': total_commands - self._enabled_count,
+            'total_aliases': self._alias_count,
             'trigger_word': self.config['trigger_word'],
             'last_modified': self.config['metadata'].get('last_modified'),
             'version': self.config['metadata'].get('version')
         }
 
 
+# Instancje managera współdzielone w procesie (bezwzględna ścieżka -> manager)
+_instances: Dict[str, VoiceCommandsConfig] = {}
+_instances_lock = threading.Lock()
+
+
 # Funkcja pomocnicza
 def get_config_manager(config_path: Optional[str] = None) -> VoiceCommandsConfig:
     """
     Zwraca instancję managera konfiguracji
     
+    Kolejne wywołania dla tego samego pliku zwracają tę samą instancję - plik
+    jest parsowany ponownie tylko, gdy zmienił się na dysku. Manager nie ma
+    własnej blokady, równoległe zmiany serializuje wywołujący.
+    
     Args:
         config_path: Opcjonalna ścieżka do pliku konfiguracji
     
     Returns:
         VoiceCommandsConfig instance
     """
-    return VoiceCommandsConfig(config_path)
+    key = os.path.abspath(config_path or VoiceCommandsConfig.DEFAULT_CONFIG_PATH)
+    with _instances_lock:
+        manager = _instances.get(key)
+        if manager is None:
+            manager = _instances[key] = VoiceCommandsConfig(config_path)
+        else:
+            manager.reload_if_changed()
+        return manager
 
 
 # Testy